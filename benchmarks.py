@@ -0,0 +1,86 @@
+"""
+microbenchmarks for the pricing functions, run with `python benchmarks.py`
+"""
+
+import time
+import timeit
+import numpy as np
+from options import price_single_option, euro_call_price, compute_greeks
+from option_providers import FakeOptionProvider
+from price_table import PriceTable
+
+def time_per_call(func, *args, number:int=20000, repeat:int=5):
+
+    """
+    returns the best time per call in microseconds over repeat runs of number calls
+    """
+
+    timer = timeit.Timer(lambda: func(*args))
+
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e6
+
+def bench_single_option(budget_us:float=5.0):
+
+    args = (100.0, 105.0, 0.5, 0.0, 0.05, 0.2)
+
+    fast = time_per_call(price_single_option, *args)
+    slow = time_per_call(lambda *a: (euro_call_price(*a), compute_greeks(*a)), *args, number=2000)
+
+    status = "OK" if fast <= budget_us else "OVER BUDGET"
+
+    print(f"price_single_option: {fast:.2f} us/call (budget {budget_us:.1f} us) {status}")
+    print(f"euro_call_price + compute_greeks: {slow:.2f} us/call")
+
+    return fast <= budget_us
+
+def bench_option_chain(latency:float=0.05, num_expirations:int=20):
+
+    """
+    chain load time with a simulated round trip per expiration, fetched one at a time and concurrently
+    """
+
+    timings = {}
+
+    for max_workers in (1, 8):
+
+        provider = FakeOptionProvider(num_expirations=num_expirations, latency=latency, max_workers=max_workers)
+
+        start = time.perf_counter()
+        provider.fetch_chains("FAKE")
+        timings[max_workers] = time.perf_counter() - start
+
+    print(f"option chain, {num_expirations} expirations at {latency * 1000:.0f} ms each: "
+          f"{timings[1]:.2f} s sequential, {timings[8]:.2f} s with 8 workers")
+
+def bench_price_table(num_options:int=2_000_000, seed:int=0):
+
+    """
+    bulk call pricing of random options with the interpolated price table against the exact formula
+    """
+
+    rng = np.random.default_rng(seed)
+
+    S = rng.uniform(50, 150, num_options)
+    K = rng.uniform(50, 150, num_options)
+    T = rng.uniform(0.01, 3, num_options)
+    r = rng.uniform(0, 0.06, num_options)
+    sigma = rng.uniform(0.05, 0.8, num_options)
+
+    table = PriceTable.build()
+
+    start = time.perf_counter()
+    approximate = table.call_prices(S, K, T, 0, r, sigma)
+    table_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    exact = euro_call_price(S, K, T, 0, r, sigma)
+    exact_time = time.perf_counter() - start
+
+    print(f"price table, {num_options} calls: {table_time:.3f} s interpolated, {exact_time:.3f} s exact, "
+          f"max error ${np.max(np.abs(approximate - exact)):.5f}")
+
+if __name__ == "__main__":
+
+    bench_single_option()
+    bench_option_chain()
+    bench_price_table()
@@ -0,0 +1,266 @@
+"""
+opt-in caching layer for the dashboard
+
+options.py, volatility_methods.py, stock_data.py and date_functions.py do not cache anything themselves,
+callers that want memoization wrap the coarse-grained calls they make (ex. a whole grid or a download) with cached()
+
+every cached function shares one BoundedCache, entries are evicted least recently used first once the cache holds more
+than max_bytes, each function can give its entries a ttl, and hit/miss/eviction counters are kept per function
+"""
+
+import sys
+import time
+import pickle
+import hashlib
+import threading
+import functools
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+def sizeof(value):
+
+    """
+    approximate memory footprint of value in bytes (arrays and dataframes by their buffers, containers recursively)
+    """
+
+    if isinstance(value, np.ndarray):
+        # an array that owns its buffer already counts it in getsizeof,
+        # a view keeps the whole buffer of the array it was taken from alive so that buffer is counted instead
+        if value.base is None:
+            return sys.getsizeof(value)
+        root = value
+        while isinstance(root.base, np.ndarray):
+            root = root.base
+        return sys.getsizeof(value) + max(root.nbytes, value.nbytes)
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(usage, pd.Series) else usage)
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(sizeof(v) for v in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(sizeof(k) + sizeof(v) for (k, v) in value.items())
+
+    return sys.getsizeof(value)
+
+def _fingerprint(value):
+
+    """
+    hashable stand-in for an argument, arrays and dataframes are reduced to a digest of their contents
+    """
+
+    if isinstance(value, np.ndarray) and value.dtype.hasobject:
+        # the buffer of an object array holds pointers, the elements are fingerprinted by value instead
+        return ('ndarray', value.shape, value.dtype.str, _fingerprint(value.ravel().tolist()))
+    if isinstance(value, np.ndarray):
+        return ('ndarray', value.shape, value.dtype.str, hashlib.blake2b(np.ascontiguousarray(value).tobytes(), digest_size=16).digest())
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        digest = hashlib.blake2b(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes(), digest_size=16)
+        digest.update(pickle.dumps(list(value.columns) if isinstance(value, pd.DataFrame) else value.name))
+        return (type(value).__name__, value.shape, digest.digest())
+    if isinstance(value, (list, tuple)):
+        return (type(value).__name__,) + tuple(_fingerprint(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return (type(value).__name__, frozenset(_fingerprint(v) for v in value))
+    if isinstance(value, dict):
+        # a frozenset of pairs is order independent and does not need the keys to be comparable
+        return ('dict', frozenset((_fingerprint(k), _fingerprint(v)) for (k, v) in value.items()))
+
+    return value
+
+class BoundedCache:
+
+    """
+    Description:
+
+    thread-safe LRU cache bounded by the total size of its values in bytes, with an optional ttl per entry
+
+    Parameters:
+
+    max_bytes : int - total size of the cached values above which the least recently used entries are evicted
+    """
+
+    def __init__(self, max_bytes:int=512 * 2**20):
+
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()    # key -> (value, size, expires_at, namespace)
+        self.current_bytes = 0
+        self.lock = threading.Lock()
+        self.stats = {}
+
+    def _stats(self, namespace:str):
+
+        return self.stats.setdefault(namespace, {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'bytes': 0, 'entries': 0})
+
+    def _remove(self, key, reason:str=None):
+
+        value, size, expires_at, namespace = self.entries.pop(key)
+
+        self.current_bytes -= size
+
+        stats = self._stats(namespace)
+        stats['bytes'] -= size
+        stats['entries'] -= 1
+
+        if reason is not None:
+            stats[reason] += 1
+
+    def get(self, namespace:str, key):
+
+        """
+        returns (True, value) on a hit and (False, None) on a miss or an expired entry
+        """
+
+        full_key = (namespace, key)
+
+        with self.lock:
+
+            stats = self._stats(namespace)
+            entry = self.entries.get(full_key)
+
+            if entry is not None and entry[2] is not None and entry[2] <= time.monotonic():
+                self._remove(full_key, 'expirations')
+                entry = None
+
+            if entry is None:
+                stats['misses'] += 1
+                return False, None
+
+            self.entries.move_to_end(full_key)
+            stats['hits'] += 1
+
+            return True, entry[0]
+
+    def put(self, namespace:str, key, value, ttl:float=None):
+
+        full_key = (namespace, key)
+        size = sizeof(value)
+
+        with self.lock:
+
+            if full_key in self.entries:
+                self._remove(full_key)
+
+            # values larger than the whole cache are not stored
+            if size > self.max_bytes:
+                return
+
+            expires_at = None if ttl is None else time.monotonic() + ttl
+
+            self.entries[full_key] = (value, size, expires_at, namespace)
+            self.current_bytes += size
+
+            stats = self._stats(namespace)
+            stats['bytes'] += size
+            stats['entries'] += 1
+
+            while self.current_bytes > self.max_bytes:
+                self._remove(next(iter(self.entries)), 'evictions')
+
+    def invalidate(self, namespace:str=None, key=None):
+
+        """
+        drops one entry, every entry of namespace, or everything when namespace is None
+        """
+
+        with self.lock:
+
+            if namespace is not None and key is not None:
+                targets = [(namespace, key)] if (namespace, key) in self.entries else []
+            else:
+                targets = [k for k in self.entries if namespace is None or k[0] == namespace]
+
+            for full_key in targets:
+                self._remove(full_key)
+
+default_cache = BoundedCache()
+
+def cache_stats():
+
+    """
+    returns the hit/miss/eviction/expiration counters, bytes and entries of every cached function,
+    plus a 'total' row with the overall size and the hit rate
+    """
+
+    with default_cache.lock:
+
+        stats = {name: dict(values) for (name, values) in default_cache.stats.items()}
+
+    hits = sum(s['hits'] for s in stats.values())
+    lookups = hits + sum(s['misses'] for s in stats.values())
+
+    stats['total'] = {
+                      'bytes': default_cache.current_bytes,
+                      'max_bytes': default_cache.max_bytes,
+                      'entries': len(default_cache.entries),
+                      'hit_rate': hits / lookups if lookups else 0.0
+                     }
+
+    return stats
+
+def cached(func=None, ttl:float=None, cache:BoundedCache=None):
+
+    """
+    Description:
+
+    memoizes func in a shared byte-bounded LRU cache
+    can be used as cached(func), @cached or @cached(ttl=...), the cached value itself is returned so callers must not mutate it
+
+    Parameters:
+
+    func : callable - function to memoize
+    ttl : float - seconds after which an entry is stale and recomputed, None to keep it until evicted
+    cache : BoundedCache - cache to store the entries in (defaults to the shared default_cache)
+
+    Returns:
+
+    wrapped : callable - memoized function with .invalidate(*args, **kwargs) (no arguments drops every entry
+              of the function) and .cache_info() attached
+    """
+
+    store = default_cache if cache is None else cache
+
+    def decorate(f):
+
+        namespace = f"{f.__module__}.{f.__qualname__}"
+
+        def make_key(args, kwargs):
+            return _fingerprint(args), _fingerprint(kwargs)
+
+        @functools.wraps(f)
+        def wrapper(*args, **kwargs):
+
+            key = make_key(args, kwargs)
+
+            # arguments with no fingerprint (ex. arbitrary unhashable objects) are not cached
+            try:
+                hash(key)
+            except TypeError:
+                return f(*args, **kwargs)
+
+            hit, value = store.get(namespace, key)
+
+            if hit:
+                return value
+
+            value = f(*args, **kwargs)
+            store.put(namespace, key, value, ttl)
+
+            return value
+
+        def invalidate(*args, **kwargs):
+            store.invalidate(namespace, make_key(args, kwargs) if (args or kwargs) else None)
+
+        def cache_info():
+            with store.lock:
+                return dict(store._stats(namespace))
+
+        wrapper.invalidate = invalidate
+        wrapper.cache_info = cache_info
+
+        return wrapper
+
+    if func is None:
+        return decorate
+
+    return decorate(func)
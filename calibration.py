@@ -0,0 +1,110 @@
+import numpy as np
+from options import _grid_terms, _call_price, _put_price, _vega
+
+def calibrate_volatility(market_call_prices, market_put_prices, strike_range, expiration_range, S, t, r,
+                         term_structure:bool=False, call_weights=None, put_weights=None, initial:float=0.2,
+                         sigma_min:float=1e-4, sigma_max:float=5.0, tol:float=1e-8, max_iter:int=50):
+
+    """
+    Description:
+
+    finds the volatility that minimizes the weighted squared pricing error over a whole market price grid,
+    either one sigma for every cell or one sigma per expiration (a term structure)
+
+    each iteration prices every cell at once and takes a Gauss-Newton step with the analytic vega as the Jacobian,
+    the Jacobian of a term structure is block diagonal (a cell only depends on the sigma of its expiration)
+    so every expiration is updated independently from column sums
+
+    Parameters:
+
+    market_call_prices : np.ndarray (2d-array) - call prices (strikes x expirations), NaN for missing quotes, None to use puts only
+    market_put_prices : np.ndarray (2d-array) - put prices (strikes x expirations), NaN for missing quotes, None to use calls only
+    strike_range : array-like - strike prices (rows of the grid)
+    expiration_range : array-like - times to maturity in years (columns of the grid)
+    S : float - current underlying stock price
+    t : float - current time in years (from beginning of contract)
+    r : float or np.ndarray - interest rate, scalar, per-row, per-cell or per-expiration with shape (1, len(expiration_range))
+    term_structure : bool - fit one sigma per expiration instead of a single sigma
+    call_weights : np.ndarray - weight of each call quote (defaults to 1)
+    put_weights : np.ndarray - weight of each put quote (defaults to 1)
+    initial : float - starting volatility
+    sigma_min : float - lower bound of the volatility
+    sigma_max : float - upper bound of the volatility
+    tol : float - the iteration stops once no sigma moves by more than tol
+    max_iter : int - maximum number of Gauss-Newton steps
+
+    Returns:
+
+    result : dict - 'sigma' (float, or np.ndarray with shape (1, len(expiration_range)) that the grid pricers accept as a
+                    per-expiration volatility, expirations without quotes keep initial), 'call_residuals' and
+                    'put_residuals' (model minus market price at the calibrated sigma, NaN where there is no quote),
+                    'rmse' (weighted root mean squared pricing error), 'iterations' and 'converged'
+    """
+
+    K = np.asarray(strike_range, dtype=float)
+    T = np.asarray(expiration_range, dtype=float)
+    shape = (K.size, T.size)
+
+    sides = [market_call_prices, market_put_prices]
+    weights = [call_weights, put_weights]
+
+    market = np.stack([np.full(shape, np.nan) if p is None else np.asarray(p, dtype=float) for p in sides])
+    weights = np.stack([np.broadcast_to(1.0 if w is None else np.asarray(w, dtype=float), shape) for w in weights])
+
+    valid = np.isfinite(market) & (T > t)
+    weights = np.where(valid, weights, 0.0)
+    market = np.where(valid, market, 0.0)
+
+    # columns summed per expiration for a term structure, everything summed for a single sigma
+    axes = (0, 1) if term_structure else None
+
+    sigma = np.full(T.size if term_structure else 1, float(initial))
+    converged = False
+
+    def evaluate(sigma):
+
+        g = _grid_terms(K, T, S, t, r, sigma[np.newaxis, :] if term_structure else sigma[0])
+
+        call = _call_price(g['S'], g['discounted_strike'], g['d1'], g['d2'])
+        put = _put_price(g['S'], g['discounted_strike'], g['d1'], g['d2'])
+
+        model = np.stack([np.broadcast_to(call, shape), np.broadcast_to(put, shape)])
+        vega = np.broadcast_to(_vega(g), shape)
+
+        residual = np.where(valid, model - market, 0.0)
+
+        return np.where(valid, vega, 0.0), residual
+
+    for iteration in range(1, max_iter + 1):
+
+        vega, residual = evaluate(sigma)
+
+        gradient = np.sum(weights * vega * residual, axis=axes)
+        curvature = np.sum(weights * vega**2, axis=axes)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            step = np.where(curvature > 0, gradient / curvature, 0.0)
+
+        new_sigma = np.clip(sigma - np.atleast_1d(step), sigma_min, sigma_max)
+
+        converged = bool(np.all(np.abs(new_sigma - sigma) <= tol))
+        sigma = new_sigma
+
+        if converged:
+            break
+
+    _, residual = evaluate(sigma)
+
+    total_weight = weights.sum()
+    rmse = float(np.sqrt(np.sum(weights * residual**2) / total_weight)) if total_weight > 0 else np.nan
+
+    residual = np.where(valid, residual, np.nan)
+
+    return {
+            'sigma': sigma[np.newaxis, :] if term_structure else float(sigma[0]),
+            'call_residuals': residual[0],
+            'put_residuals': residual[1],
+            'rmse': rmse,
+            'iterations': iteration,
+            'converged': converged
+           }
@@ -0,0 +1,103 @@
+import numpy as np
+from options import _bs_terms, _call_price, _put_price
+
+# number of full-size temporaries alive at once while a chunk is priced (d1, d2, the cdfs, ...)
+_TEMPORARIES_PER_CELL = 8
+
+def _chunk_shape(expirations:int, plane_cells:int, itemsize:int, max_bytes:int):
+
+    """
+    (strike rows, expirations) per chunk whose working set fits in max_bytes, whole strike rows are taken when
+    at least one fits and a single strike is split along the expiration axis otherwise
+    """
+
+    plane_bytes = plane_cells * itemsize * _TEMPORARIES_PER_CELL
+
+    if plane_bytes > max_bytes:
+        raise ValueError(f"max_bytes={max_bytes} cannot hold one spot x volatility plane ({plane_bytes} bytes)")
+
+    row_bytes = expirations * plane_bytes
+
+    if row_bytes <= max_bytes:
+        return int(max_bytes // row_bytes), expirations
+
+    return 1, int(max_bytes // plane_bytes)
+
+def compute_scenario_prices(strike_range, expiration_range, spot_range, vol_range, t:float=0, r:float=0.05,
+                            option_type:str="call", max_bytes:int=256 * 2**20, dtype=np.float64, out=None, memmap_path=None):
+
+    """
+    Description:
+
+    prices a strike x expiration x spot x volatility scenario cube in chunks of strikes (and of expirations when a
+    single strike does not fit) so the temporaries never exceed max_bytes, each chunk is written straight into the output buffer
+
+    Parameters:
+
+    strike_range : array-like - strike prices
+    expiration_range : array-like - times to maturity in years
+    spot_range : array-like - underlying prices to price under
+    vol_range : array-like - volatilities to price under
+    t : float - current time in years (from beginning of contract)
+    r : float - interest rate
+    option_type : str - call or put
+    max_bytes : int - memory ceiling for the temporaries of a single chunk, a ValueError is raised when one spot x volatility plane does not fit
+    dtype : np.float64 or np.float32 - precision of the computation and of the output
+    out : np.ndarray - optional caller-provided buffer of shape (len(strike_range), len(expiration_range), len(spot_range), len(vol_range))
+    memmap_path : str - optional .npy file to create and write the results into (ignored when out is given)
+
+    Returns:
+
+    prices : np.ndarray (4d-array) - option prices indexed [strike, expiration, spot, volatility],
+             out or a np.memmap over memmap_path when one of them was given
+    """
+
+    if option_type not in ("call", "put"):
+        raise ValueError(f"option_type must be 'call' or 'put', got {option_type}")
+
+    dtype = np.dtype(dtype)
+
+    if dtype not in (np.float32, np.float64):
+        raise ValueError(f"dtype must be float32 or float64, got {dtype}")
+
+    K_all = np.atleast_1d(np.asarray(strike_range, dtype=dtype))
+    T = np.atleast_1d(np.asarray(expiration_range, dtype=dtype))
+    S = np.atleast_1d(np.asarray(spot_range, dtype=dtype))
+    sigma = np.atleast_1d(np.asarray(vol_range, dtype=dtype))
+
+    shape = (K_all.size, T.size, S.size, sigma.size)
+
+    if out is None:
+        if memmap_path is not None:
+            out = np.lib.format.open_memmap(memmap_path, mode='w+', dtype=dtype, shape=shape)
+        else:
+            out = np.empty(shape, dtype=dtype)
+    elif out.shape != shape:
+        raise ValueError(f"out has shape {out.shape}, expected {shape}")
+
+    # axes laid out as [strike, expiration, spot, volatility] so every term only broadcasts to the full cube where it has to
+    tau = (T - dtype.type(t))[:, np.newaxis, np.newaxis]
+    vol = sigma[np.newaxis, np.newaxis, :]
+    spot = S[np.newaxis, :, np.newaxis]
+    rate = dtype.type(r)
+
+    price = _call_price if option_type == "call" else _put_price
+
+    rows, columns = _chunk_shape(T.size, S.size * sigma.size, dtype.itemsize, max_bytes)
+
+    for start in range(0, K_all.size, rows):
+
+        K = K_all[start:start + rows, np.newaxis, np.newaxis, np.newaxis]
+
+        for first in range(0, T.size, columns):
+
+            terms = _bs_terms(spot, K, tau[first:first + columns], rate, vol)
+
+            prices = price(spot, terms['discounted_strike'], terms['d1'], terms['d2'])
+
+            out[start:start + rows, first:first + columns] = prices
+
+    if isinstance(out, np.memmap):
+        out.flush()
+
+    return out
@@ -1,7 +1,5 @@
 import datetime as dt
-import streamlit as st
 
-@st.cache_data
 def str_date_to_years(expiration_range:str):
 
     """
@@ -0,0 +1,277 @@
+import os
+import sqlite3
+import threading
+import datetime as dt
+import pandas as pd
+
+COLUMNS = ['Close', 'High', 'Low', 'Open', 'Volume']
+
+# columns yf.download adds with actions=True, non-zero on the dates of a dividend or split
+ACTION_COLUMNS = ['Dividends', 'Stock Splits']
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "black_scholes", "history.sqlite")
+
+class HistoryStore:
+
+    """
+    Description:
+
+    persistent SQLite store of daily OHLC bars keyed by ticker, only bars newer (or older) than what is already
+    stored get downloaded, and valid tickers are remembered so they are only checked against the network once,
+    the public methods are serialized by a lock so one store can be shared between threads
+
+    Parameters:
+
+    path : str - location of the SQLite file (created if missing)
+    """
+
+    def __init__(self, path:str=DEFAULT_PATH):
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        self.path = path
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+
+        # the connection is shared by every dashboard session thread, a replace must not interleave with another read
+        self.lock = threading.RLock()
+
+        with self.connection:
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS bars (
+                    ticker TEXT NOT NULL,
+                    date TEXT NOT NULL,
+                    close REAL, high REAL, low REAL, open REAL, volume REAL,
+                    PRIMARY KEY (ticker, date)
+                )""")
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS tickers (
+                    ticker TEXT PRIMARY KEY,
+                    valid INTEGER NOT NULL,
+                    last_fetch TEXT,
+                    first_requested TEXT
+                )""")
+
+            # stores created before first_requested existed
+            columns = [row[1] for row in self.connection.execute("PRAGMA table_info(tickers)")]
+
+            if 'first_requested' not in columns:
+                self.connection.execute("ALTER TABLE tickers ADD COLUMN first_requested TEXT")
+
+    def ticker_is_valid(self, ticker:str, check):
+
+        """
+        returns True for a ticker already known to be valid, otherwise calls check(ticker) and remembers the answer
+        only when it is positive, so a ticker that fails once (ex. not listed yet) is checked again next time
+        """
+
+        with self.lock:
+
+            row = self.connection.execute("SELECT valid FROM tickers WHERE ticker = ?", (ticker,)).fetchone()
+
+            if row is not None and row[0]:
+                return True
+
+            valid = bool(check(ticker))
+
+            if valid:
+                with self.connection:
+                    self.connection.execute("INSERT OR REPLACE INTO tickers (ticker, valid) VALUES (?, 1)", (ticker,))
+
+            return valid
+
+    def _stored_range(self, ticker:str):
+
+        first, last = self.connection.execute("SELECT MIN(date), MAX(date) FROM bars WHERE ticker = ?", (ticker,)).fetchone()
+
+        fetched = self.connection.execute("SELECT last_fetch, first_requested FROM tickers WHERE ticker = ?", (ticker,)).fetchone()
+
+        return (first, last) + (tuple(fetched) if fetched else (None, None))
+
+    def _rows(self, ticker:str, bars:pd.DataFrame):
+
+        # yfinance returns (Price, Ticker) columns, keep the price level only
+        if isinstance(bars.columns, pd.MultiIndex):
+            bars = bars.droplevel(1, axis=1)
+
+        return [(ticker, index.strftime("%Y-%m-%d"), *(float(row[c]) for c in COLUMNS))
+                for (index, row) in bars[COLUMNS].dropna(how='all').iterrows()]
+
+    def _insert(self, ticker:str, bars:pd.DataFrame):
+
+        if bars is None or bars.empty:
+            return
+
+        rows = self._rows(ticker, bars)
+
+        with self.connection:
+            self.connection.executemany("INSERT OR REPLACE INTO bars VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def _replace(self, ticker:str, bars:pd.DataFrame):
+
+        """
+        swaps every stored bar of ticker for bars in one transaction (the stored bars are kept if the download came back empty)
+        """
+
+        if bars is None or bars.empty:
+            return
+
+        rows = self._rows(ticker, bars)
+
+        with self.connection:
+            self.connection.execute("DELETE FROM bars WHERE ticker = ?", (ticker,))
+            self.connection.executemany("INSERT INTO bars VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+    @staticmethod
+    def _has_action_after(bars:pd.DataFrame, last:dt.date):
+
+        """
+        True when bars (downloaded with actions=True) report a dividend or split after last, False without action columns
+        """
+
+        if bars is None or bars.empty:
+            return False
+
+        if isinstance(bars.columns, pd.MultiIndex):
+            bars = bars.droplevel(1, axis=1)
+
+        present = [c for c in ACTION_COLUMNS if c in bars.columns]
+
+        if not present:
+            return False
+
+        dates = bars.index.tz_localize(None) if bars.index.tz is not None else bars.index
+
+        events = bars.loc[dates.normalize() > pd.Timestamp(last), present]
+
+        return bool((events.fillna(0) != 0).to_numpy().any())
+
+    def _mark_fetched(self, ticker:str, now:dt.datetime):
+
+        with self.connection:
+            self.connection.execute("INSERT OR IGNORE INTO tickers (ticker, valid) VALUES (?, 1)", (ticker,))
+            self.connection.execute("UPDATE tickers SET last_fetch = ? WHERE ticker = ?", (now.isoformat(timespec='seconds'), ticker))
+
+    def _mark_requested(self, ticker:str, start:dt.date):
+
+        """
+        remembers the earliest date bars of ticker were requested from, so a range before the listing date that came back
+        empty is not downloaded again
+        """
+
+        with self.connection:
+            self.connection.execute("INSERT OR IGNORE INTO tickers (ticker, valid) VALUES (?, 1)", (ticker,))
+            self.connection.execute("UPDATE tickers SET first_requested = ? WHERE ticker = ? AND "
+                                    "(first_requested IS NULL OR first_requested > ?)", (start.isoformat(), ticker, start.isoformat()))
+
+    def expire(self, ticker:str=None):
+
+        """
+        forgets when ticker (every ticker when None) was last downloaded so the next get_history fetches the newest bars
+        """
+
+        with self.lock, self.connection:
+            if ticker is None:
+                self.connection.execute("UPDATE tickers SET last_fetch = NULL")
+            else:
+                self.connection.execute("UPDATE tickers SET last_fetch = NULL WHERE ticker = ?", (ticker,))
+
+    def read(self, ticker:str, start_date:dt.datetime):
+
+        """
+        returns the stored bars from start_date on, shaped like yf.download (columns (Price, Ticker), Date index)
+        """
+
+        with self.lock:
+
+            frame = pd.read_sql_query("SELECT date, close, high, low, open, volume FROM bars "
+                                      "WHERE ticker = ? AND date >= ? ORDER BY date",
+                                      self.connection, params=(ticker, start_date.strftime("%Y-%m-%d")),
+                                      parse_dates=['date'], index_col='date')
+
+            frame.index.name = 'Date'
+            frame.columns = pd.MultiIndex.from_product([COLUMNS, [ticker]], names=['Price', 'Ticker'])
+
+            return frame
+
+    def get_history(self, ticker:str, start_date:dt.datetime, download, max_age:float=5 * 60):
+
+        """
+        Description:
+
+        serves bars from start_date until today (the bar of a session still in progress included), downloading only the
+        missing ranges with download(ticker, start, end), no network call is made when the newest stored bar is a completed
+        bar of the latest session or the ticker was downloaded less than max_age seconds ago
+
+        a bar is only known to be complete once it was downloaded on a later day, so the newest stored bar is always
+        downloaded again (replacing the partial intraday one) and expire() forces that before max_age has passed
+
+        the downloaded bars are split and dividend adjusted, so when the new bars report a dividend or split after the
+        newest stored bar (download is expected to include the ACTION_COLUMNS) the older bars are on a stale basis
+        and the whole stored range is downloaded again
+
+        Parameters:
+
+        ticker : str - ticker symbol
+        start_date : dt.datetime - first date needed
+        download : callable - download(ticker, start, end) returning a yf.download style dataframe (end excluded),
+                              with the ACTION_COLUMNS so corporate actions can be detected
+        max_age : float - seconds during which a download is reused, bounds how stale a partial intraday bar can get
+
+        Returns:
+
+        stock_data : pd.DataFrame - bars from start_date on
+        """
+
+        with self.lock:
+
+            now = dt.datetime.now()
+            today = now.date()
+            end = today + dt.timedelta(days=1)
+            latest_session = pd.offsets.BDay().rollback(pd.Timestamp(today)).date()
+
+            first, last, last_fetch, first_requested = self._stored_range(ticker)
+
+            start = start_date.date() if isinstance(start_date, dt.datetime) else start_date
+
+            if first is None:
+                self._insert(ticker, download(ticker, start, end))
+                self._mark_fetched(ticker, now)
+                self._mark_requested(ticker, start)
+            else:
+                first = dt.date.fromisoformat(first)
+                last = dt.date.fromisoformat(last)
+                last_fetch = None if last_fetch is None else dt.datetime.fromisoformat(last_fetch)
+
+                recent = last_fetch is not None and (now - last_fetch).total_seconds() < max_age
+                complete = last_fetch is not None and last_fetch.date() > last
+
+                fresh = recent or (complete and last >= latest_session)
+
+                if first_requested is not None:
+                    # everything from first_requested on was already asked for, bars missing there do not exist (ex. before a listing)
+                    requested = dt.date.fromisoformat(first_requested)
+                    backfill = start < requested
+                else:
+                    # a gap of a long weekend or holiday before the first stored bar is not missing data
+                    requested = first
+                    backfill = (first - start).days > 4
+
+                if backfill:
+                    self._insert(ticker, download(ticker, start, requested))
+                    self._mark_requested(ticker, start)
+                    first = min(first, start)
+
+                if not fresh:
+
+                    # starts at the newest stored bar so a partial one is overwritten
+                    bars = download(ticker, last, end)
+
+                    if self._has_action_after(bars, last):
+                        self._replace(ticker, download(ticker, first, end))
+                    else:
+                        self._insert(ticker, bars)
+
+                    self._mark_fetched(ticker, now)
+
+            return self.read(ticker, start_date)
@@ -0,0 +1,146 @@
+import numpy as np
+from options import _grid_terms, _bs_terms, _call_price, _vega
+
+def _call_price_vega_volga(S, K, tau, r, sigma):
+
+    """
+    Black-Scholes call price with its first and second derivative in sigma, evaluated elementwise on flat arrays
+    """
+
+    terms = _bs_terms(S, K, tau, r, sigma)
+
+    price = _call_price(S, terms['discounted_strike'], terms['d1'], terms['d2'])
+    vega = _vega(terms)
+    volga = vega * terms['d1'] * terms['d2'] / sigma
+
+    return price, vega, volga
+
+def compute_implied_volatility_grid(market_prices, strike_range, expiration_range, S, t, r, option_type:str="call",
+                                    sigma_min:float=1e-4, sigma_max:float=5.0, tol:float=1e-10, sigma_tol:float=1e-8,
+                                    max_iter:int=100):
+
+    """
+    Description:
+
+    inverts Black-Scholes for every cell of a market price matrix at once, each iteration takes a Halley step
+    (Newton with a second order correction) and falls back to bisection on the [sigma_min, sigma_max] bracket
+    whenever the step leaves the bracket or the vega is too small to trust
+
+    puts are converted to calls with put-call parity so both sides use the same solver
+
+    Parameters:
+
+    market_prices : np.ndarray (2d-array) - option prices with shape (len(strike_range), len(expiration_range)), NaN for missing quotes
+    strike_range : array-like - strike prices (rows of the grid)
+    expiration_range : array-like - times to maturity in years (columns of the grid)
+    S : float or np.ndarray - current underlying stock price, scalar, per-row or per-cell
+    t : float - current time in years (from beginning of contract)
+    r : float or np.ndarray - interest rate, scalar, per-row or per-cell
+    option_type : str - call or put
+    sigma_min : float - lower end of the volatility bracket
+    sigma_max : float - upper end of the volatility bracket
+    tol : float - absolute pricing error below which a cell can be considered converged
+    sigma_tol : float - the pricing error divided by vega (the implied error in sigma) must also be below this
+    max_iter : int - maximum number of iterations
+
+    Returns:
+
+    implied_vol : np.ndarray (2d-array) - implied volatility per cell, NaN where no solution was found
+    converged : np.ndarray (2d-array of bool) - True where the solver converged, False for missing quotes,
+                quotes outside the no-arbitrage bounds and cells that ran out of iterations
+    """
+
+    if option_type not in ("call", "put"):
+        raise ValueError(f"option_type must be 'call' or 'put', got {option_type}")
+
+    # sigma only fixes the broadcast shape here, d1/d2 are not used
+    g = _grid_terms(strike_range, expiration_range, S, t, r, 1.0)
+
+    shape = g['shape']
+
+    prices = np.broadcast_to(np.asarray(market_prices, dtype=float), shape)
+    S_grid = np.broadcast_to(g['S'], shape)
+    K_grid = np.broadcast_to(g['K'], shape)
+    tau_grid = np.broadcast_to(g['tau'], shape)
+    r_grid = np.broadcast_to(g['r'], shape)
+    discounted_strike = K_grid * np.broadcast_to(g['discount'], shape)
+
+    call_prices = prices if option_type == "call" else prices + S_grid - discounted_strike
+
+    # no-arbitrage bounds for a call without dividends
+    lower = np.maximum(S_grid - discounted_strike, 0)
+    upper = S_grid
+
+    valid = np.isfinite(call_prices) & (tau_grid > 0) & (call_prices > lower) & (call_prices < upper)
+
+    implied_vol = np.full(shape, np.nan)
+    converged = np.zeros(shape, dtype=bool)
+
+    idx = np.flatnonzero(valid)
+
+    if idx.size == 0:
+        return implied_vol, converged
+
+    target = call_prices.ravel()[idx]
+    S_v = S_grid.ravel()[idx]
+    K_v = K_grid.ravel()[idx]
+    tau_v = tau_grid.ravel()[idx]
+    r_v = r_grid.ravel()[idx]
+
+    lo = np.full(idx.size, sigma_min)
+    hi = np.full(idx.size, sigma_max)
+
+    # Brenner-Subrahmanyam style starting point, clipped into the bracket
+    sigma = np.sqrt(2 * np.abs(np.log(S_v / K_v) + r_v * tau_v) / tau_v)
+    sigma = np.clip(np.where(sigma > 0, sigma, 0.2), sigma_min, sigma_max)
+
+    done = np.zeros(idx.size, dtype=bool)
+    active = np.arange(idx.size)
+
+    for _ in range(max_iter):
+
+        s = sigma[active]
+
+        price, vega, volga = _call_price_vega_volga(S_v[active], K_v[active], tau_v[active], r_v[active], s)
+
+        diff = price - target[active]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            finished = (np.abs(diff) < tol) & (np.abs(diff) < sigma_tol * vega)
+
+        # shrink the bracket around the root
+        too_high = diff > 0
+        hi[active] = np.where(too_high, np.minimum(hi[active], s), hi[active])
+        lo[active] = np.where(too_high, lo[active], np.maximum(lo[active], s))
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            step = 2 * diff * vega / (2 * vega**2 - diff * volga)
+
+        candidate = s - step
+
+        a_lo, a_hi = lo[active], hi[active]
+
+        use_bisection = ~np.isfinite(candidate) | (candidate <= a_lo) | (candidate >= a_hi) | (vega < 1e-12)
+        candidate = np.where(use_bisection, 0.5 * (a_lo + a_hi), candidate)
+
+        # a collapsed bracket pins the root down to sigma_tol, unless it collapsed onto an end of
+        # [sigma_min, sigma_max] in which case the root lies outside the bracket
+        collapsed = (a_hi - a_lo) < sigma_tol
+        interior = (a_lo > sigma_min) & (a_hi < sigma_max)
+
+        done[active[finished | (collapsed & interior)]] = True
+        finished |= collapsed
+
+        sigma[active] = np.where(finished, s, candidate)
+
+        active = active[~finished]
+
+        if active.size == 0:
+            break
+
+    solution = np.where(done, sigma, np.nan)
+
+    implied_vol.ravel()[idx] = solution
+    converged.ravel()[idx] = done
+
+    return implied_vol, converged
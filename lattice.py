@@ -0,0 +1,174 @@
+import numpy as np
+
+def _lattice_parameters(T:float, r:float, sigma:float, steps:int, method:str):
+
+    """
+    returns the per-step log move, branch probabilities (down, [middle,] up) and discount factor of the lattice
+    """
+
+    dt = T / steps
+    discount = np.exp(-r * dt)
+
+    if method == "binomial":
+
+        # Cox-Ross-Rubinstein
+        dx = sigma * np.sqrt(dt)
+        p_up = (np.exp(r * dt) - np.exp(-dx)) / (np.exp(dx) - np.exp(-dx))
+
+        return dx, (1 - p_up, p_up), discount, dt
+
+    if method == "trinomial":
+
+        # Boyle / Hull log-space trinomial tree
+        dx = sigma * np.sqrt(3 * dt)
+        nu = r - 0.5 * sigma**2
+        a = (sigma**2 * dt + nu**2 * dt**2) / dx**2
+        b = nu * dt / dx
+
+        return dx, (0.5 * (a - b), 1 - a, 0.5 * (a + b)), discount, dt
+
+    raise ValueError(f"method must be 'binomial' or 'trinomial', got {method}")
+
+def _backward_induction(K, T:float, S:float, r:float, sigma:float, option_type:str, steps:int, method:str, american:bool):
+
+    """
+    rolls the payoff of every strike back through one shared lattice, only the current level is kept (O(steps) memory per strike)
+
+    returns the option values at the first three levels of the tree (for the Greeks) and the log move
+    """
+
+    dx, probs, discount, dt = _lattice_parameters(T, r, sigma, steps, method)
+
+    sign = 1 if option_type == "call" else -1
+
+    # node j of a level holds log(S) + (j - centre) * dx, binomial levels move by 2 * dx per node
+    spacing = 2 if method == "binomial" else 1
+    width = len(probs) - 1
+
+    def level_prices(i):
+        nodes = width * i + 1
+        return S * np.exp((np.arange(nodes) - width * i / 2) * spacing * dx)
+
+    values = np.maximum(sign * (level_prices(steps) - K[:, np.newaxis]), 0)
+
+    early_levels = {}
+
+    for i in range(steps - 1, -1, -1):
+
+        continuation = sum(p * values[:, k:values.shape[1] - width + k] for (k, p) in enumerate(probs))
+        values = discount * continuation
+
+        if american:
+            values = np.maximum(values, sign * (level_prices(i) - K[:, np.newaxis]))
+
+        if i <= 2:
+            early_levels[i] = values
+
+    return early_levels, level_prices, dx, dt
+
+def lattice_option_prices(strike_range, T:float, S:float, r:float, sigma:float, option_type:str="put", steps:int=500,
+                          method:str="binomial", american:bool=True, greeks:bool=False):
+
+    """
+    Description:
+
+    prices every strike of one expiration on a single shared binomial (CRR) or trinomial lattice, the backward induction
+    is done one level at a time as array operations across all strikes and nodes
+
+    Parameters:
+
+    strike_range : array-like - strike prices
+    T : float - time to maturity in years
+    S : float - current underlying stock price
+    r : float - interest rate
+    sigma : float - volatility
+    option_type : str - call or put
+    steps : int - number of time steps (at least 3)
+    method : str - binomial or trinomial
+    american : bool - allow early exercise
+    greeks : bool - also return the Greeks
+
+    Returns:
+
+    prices : np.ndarray - option price per strike, or when greeks is True
+    - Dictionary: {Price, Delta, Gamma, Theta, Vega, Rho} of np.ndarrays per strike, same units as options.compute_greeks
+      (Delta, Gamma and Theta are read off the tree, Vega and Rho come from bump-and-reprice)
+    """
+
+    if option_type not in ("call", "put"):
+        raise ValueError(f"option_type must be 'call' or 'put', got {option_type}")
+
+    if steps < 3:
+        raise ValueError(f"steps must be at least 3, got {steps}")
+
+    K = np.atleast_1d(np.asarray(strike_range, dtype=float))
+
+    levels, level_prices, dx, dt = _backward_induction(K, T, S, r, sigma, option_type, steps, method, american)
+
+    price = levels[0][:, 0]
+
+    if not greeks:
+        return price
+
+    if method == "binomial":
+
+        # delta from level 1, gamma and theta from level 2 whose middle node is back at S
+        S1, S2 = level_prices(1), level_prices(2)
+        V1, V2 = levels[1], levels[2]
+
+        delta = (V1[:, 1] - V1[:, 0]) / (S1[1] - S1[0])
+
+        delta_up = (V2[:, 2] - V2[:, 1]) / (S2[2] - S2[1])
+        delta_down = (V2[:, 1] - V2[:, 0]) / (S2[1] - S2[0])
+
+        gamma = (delta_up - delta_down) / (0.5 * (S2[2] - S2[0]))
+        theta = (V2[:, 1] - price) / (2 * dt)
+
+    else:
+
+        # level 1 of the trinomial tree already straddles S
+        S1, V1 = level_prices(1), levels[1]
+
+        delta = (V1[:, 2] - V1[:, 0]) / (S1[2] - S1[0])
+
+        delta_up = (V1[:, 2] - V1[:, 1]) / (S1[2] - S1[1])
+        delta_down = (V1[:, 1] - V1[:, 0]) / (S1[1] - S1[0])
+
+        gamma = (delta_up - delta_down) / (0.5 * (S1[2] - S1[0]))
+        theta = (V1[:, 1] - price) / dt
+
+    # the lattice price carries node-alignment noise that swamps tiny bumps (vega off by several % at 1e-4),
+    # one volatility point and 0.5% of rate average it out while keeping the truncation error well below 1%
+    vol_bump = 1e-2
+    rate_bump = 5e-3
+
+    def reprice(r_, sigma_):
+        return _backward_induction(K, T, S, r_, sigma_, option_type, steps, method, american)[0][0][:, 0]
+
+    vega = (reprice(r, sigma + vol_bump) - reprice(r, sigma - vol_bump)) / (2 * vol_bump)
+    rho = (reprice(r + rate_bump, sigma) - reprice(r - rate_bump, sigma)) / (2 * rate_bump)
+
+    return {
+            'Price': price,
+            'Delta': delta,
+            'Gamma': gamma,
+            'Theta': theta / 365,
+            'Vega': vega / 100,
+            'Rho': rho / 100
+           }
+
+def lattice_option_grid(strike_range, expiration_range, S:float, r:float, sigma:float, option_type:str="put", steps:int=500,
+                        method:str="binomial", american:bool=True):
+
+    """
+    Description:
+
+    lattice prices over a strike x expiration grid, one shared lattice per expiration
+
+    Returns:
+
+    prices : np.ndarray (2d-array) - option prices with shape (len(strike_range), len(expiration_range))
+    """
+
+    return np.column_stack([lattice_option_prices(strike_range, T, S, r, sigma, option_type, steps, method, american)
+                            for T in expiration_range])
@@ -0,0 +1,233 @@
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from options import euro_call_price
+
+def _chunk_sizes(n_paths:int, paths_per_chunk:int):
+
+    """
+    splits n_paths into chunks of at most paths_per_chunk
+    """
+
+    full, rest = divmod(n_paths, paths_per_chunk)
+
+    return [paths_per_chunk] * full + ([rest] if rest else [])
+
+def _normals(rng, n:int, size:int, antithetic:bool):
+
+    """
+    standard normals of shape (n, size, ...) where each sample is an antithetic (Z, -Z) pair when antithetic is True
+    """
+
+    Z = rng.standard_normal((n, size))
+
+    return np.stack([Z, -Z]) if antithetic else Z[np.newaxis]
+
+def _moment_sums(Y, X):
+
+    """
+    sums needed to combine chunks into a control variate estimate, Y and X are samples along axis 0
+    """
+
+    return np.array([Y.shape[0]]), Y.sum(axis=0), (Y**2).sum(axis=0), X.sum(axis=0), (X**2).sum(axis=0), (X * Y).sum(axis=0)
+
+def _combine(chunks):
+
+    """
+    adds up the per-chunk moment sums returned by the workers
+    """
+
+    return [sum(parts) for parts in zip(*chunks)]
+
+def _control_variate_estimate(sums, control_mean, control_variate:bool):
+
+    """
+    returns the (optionally control variate adjusted) mean of Y and its standard error from accumulated sums
+    """
+
+    n, sum_y, sum_y2, sum_x, sum_x2, sum_xy = sums
+    n = n[0]
+
+    mean_y = sum_y / n
+    var_y = sum_y2 / n - mean_y**2
+
+    if not control_variate:
+        return mean_y, np.sqrt(np.maximum(var_y, 0) / n)
+
+    mean_x = sum_x / n
+    var_x = sum_x2 / n - mean_x**2
+    cov_xy = sum_xy / n - mean_x * mean_y
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        beta = np.where(var_x > 0, cov_xy / var_x, 0)
+
+    estimate = mean_y - beta * (mean_x - control_mean)
+    residual_var = var_y - beta * cov_xy
+
+    return estimate, np.sqrt(np.maximum(residual_var, 0) / n)
+
+def _grid_chunk(args):
+
+    """
+    worker: simulates one chunk of terminal prices at every expiration and returns the moment sums of the discounted payoffs
+    """
+
+    seed, n, S, K, T, r, sigma, antithetic = args
+
+    rng = np.random.Generator(np.random.PCG64(seed))
+
+    # exact GBM increments between consecutive expirations, T is sorted ascending
+    dt = np.diff(T, prepend=0)
+    Z = _normals(rng, n, T.size, antithetic)
+    log_S = np.log(S) + np.cumsum((r - 0.5 * sigma**2) * dt + sigma * np.sqrt(dt) * Z, axis=-1)
+
+    S_T = np.exp(log_S)                                 # (pairs, n, len(T))
+    discount = np.exp(-r * T)
+
+    calls = np.maximum(S_T[:, :, np.newaxis, :] - K[:, np.newaxis], 0) * discount
+    puts = np.maximum(K[:, np.newaxis] - S_T[:, :, np.newaxis, :], 0) * discount
+
+    # the discounted terminal price is the control, its expectation is S
+    X = (S_T * discount).mean(axis=0)[:, np.newaxis, :]
+
+    return _moment_sums(calls.mean(axis=0), X), _moment_sums(puts.mean(axis=0), X)
+
+def monte_carlo_option_grid(strike_range, expiration_range, S:float, r:float, sigma:float, n_paths:int=100000,
+                            paths_per_chunk:int=2000, seed:int=0, antithetic:bool=True, control_variate:bool=True,
+                            n_workers:int=1):
+
+    """
+    Description:
+
+    Monte Carlo prices of european calls and puts over a whole strike x expiration grid from one set of simulated
+    GBM paths, the paths are generated in fixed-size chunks (each with its own RNG stream spawned from seed)
+    so memory stays bounded and the result does not depend on n_workers
+
+    Parameters:
+
+    strike_range : array-like - strike prices (rows of the grid)
+    expiration_range : array-like - times to maturity in years (columns of the grid)
+    S : float - current underlying stock price
+    r : float - interest rate
+    sigma : float - volatility
+    n_paths : int - number of samples (antithetic pairs count as one sample)
+    paths_per_chunk : int - samples simulated at once, memory grows with paths_per_chunk * len(strike_range) * len(expiration_range)
+    seed : int - seed of the root SeedSequence
+    antithetic : bool - use antithetic (Z, -Z) pairs
+    control_variate : bool - use the discounted terminal price (whose expectation is S) as a control variate
+    n_workers : int - number of processes, 1 runs in the current process
+
+    Returns:
+
+    call_prices : np.ndarray (2d-array) - call prices with shape (len(strike_range), len(expiration_range))
+    put_prices : np.ndarray (2d-array) - put prices
+    call_stderr : np.ndarray (2d-array) - standard error of the call prices
+    put_stderr : np.ndarray (2d-array) - standard error of the put prices
+    """
+
+    K = np.asarray(strike_range, dtype=float)
+    T = np.asarray(expiration_range, dtype=float)
+
+    order = np.argsort(T)
+
+    sizes = _chunk_sizes(n_paths, paths_per_chunk)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    tasks = [(s, n, S, K, T[order], r, sigma, antithetic) for (s, n) in zip(seeds, sizes)]
+
+    if n_workers > 1:
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            results = list(pool.map(_grid_chunk, tasks))
+    else:
+        results = [_grid_chunk(task) for task in tasks]
+
+    call_sums = _combine([call for (call, _) in results])
+    put_sums = _combine([put for (_, put) in results])
+
+    call_prices, call_stderr = _control_variate_estimate(call_sums, S, control_variate)
+    put_prices, put_stderr = _control_variate_estimate(put_sums, S, control_variate)
+
+    # undo the sort of the expirations
+    unsort = np.argsort(order)
+
+    return call_prices[:, unsort], put_prices[:, unsort], call_stderr[:, unsort], put_stderr[:, unsort]
+
+def _path_chunk(args):
+
+    """
+    worker: simulates one chunk of full GBM paths and returns the moment sums of the discounted payoff
+    """
+
+    seed, n, S, T, r, sigma, n_steps, antithetic, payoff, control_strike = args
+
+    rng = np.random.Generator(np.random.PCG64(seed))
+
+    dt = T / n_steps
+    Z = _normals(rng, n, n_steps, antithetic)
+    log_S = np.log(S) + np.cumsum((r - 0.5 * sigma**2) * dt + sigma * np.sqrt(dt) * Z, axis=-1)
+
+    # prepend S so paths[..., 0] is today's price
+    paths = np.concatenate([np.full(log_S.shape[:-1] + (1,), S), np.exp(log_S)], axis=-1)
+
+    discount = np.exp(-r * T)
+
+    Y = np.stack([payoff(p) for p in paths]) * discount
+
+    if control_strike is None:
+        X = np.zeros_like(Y)
+    else:
+        X = np.maximum(paths[..., -1] - control_strike, 0) * discount
+
+    return _moment_sums(Y.mean(axis=0), X.mean(axis=0))
+
+def monte_carlo_path_price(payoff, S:float, T:float, r:float, sigma:float, n_steps:int=252, n_paths:int=100000,
+                           paths_per_chunk:int=5000, seed:int=0, antithetic:bool=True, control_strike:float=None,
+                           n_workers:int=1):
+
+    """
+    Description:
+
+    Monte Carlo price of a (possibly path-dependent) payoff under GBM, simulated in fixed-size chunks
+    with independent RNG streams spawned from seed
+
+    Parameters:
+
+    payoff : callable - maps an array of paths with shape (n, n_steps + 1) to an array of n payoffs,
+                        must be a module level function when n_workers > 1 (ex. lambda p: np.maximum(p.mean(axis=1) - 100, 0))
+    S : float - current underlying stock price
+    T : float - time to maturity in years
+    r : float - interest rate
+    sigma : float - volatility
+    n_steps : int - number of time steps per path
+    n_paths : int - number of samples (antithetic pairs count as one sample)
+    paths_per_chunk : int - samples simulated at once
+    seed : int - seed of the root SeedSequence
+    antithetic : bool - use antithetic (Z, -Z) pairs
+    control_strike : float - when given, a european call with this strike is used as a control variate,
+                             its expectation comes from the closed form euro_call_price
+    n_workers : int - number of processes, 1 runs in the current process
+
+    Returns:
+
+    price : float - estimated option price
+    stderr : float - standard error of the estimate
+    """
+
+    sizes = _chunk_sizes(n_paths, paths_per_chunk)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    tasks = [(s, n, S, T, r, sigma, n_steps, antithetic, payoff, control_strike) for (s, n) in zip(seeds, sizes)]
+
+    if n_workers > 1:
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            results = list(pool.map(_path_chunk, tasks))
+    else:
+        results = [_path_chunk(task) for task in tasks]
+
+    sums = _combine(results)
+
+    use_control = control_strike is not None
+    control_mean = euro_call_price(S, control_strike, T, 0, r, sigma) if use_control else 0
+
+    price, stderr = _control_variate_estimate(sums, control_mean, use_control)
+
+    return float(price), float(stderr)
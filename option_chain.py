@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# chain field -> column name in the yfinance option chain dataframes
+FIELDS = {
+          'bid': 'bid',
+          'ask': 'ask',
+          'last': 'lastPrice',
+          'volume': 'volume',
+          'open_interest': 'openInterest'
+         }
+
+class OptionChain:
+
+    """
+    Description:
+
+    columnar option chain, every quote is a row of contiguous arrays (strike, expiry index, call/put flag, bid, ask,
+    last, volume, open interest), strikes is the sorted union of the strikes listed on every expiration
+    and strike_index maps each quote to its row in it
+
+    Parameters:
+
+    expirations : list - expiration dates ("%Y-%m-%d"), expiry_index points into this list
+    strike : np.ndarray - strike of each quote
+    expiry_index : np.ndarray - expiration of each quote
+    is_call : np.ndarray - True for calls, False for puts
+    fields : dict - {'bid', 'ask', 'last', 'volume', 'open_interest'} arrays per quote
+    """
+
+    def __init__(self, expirations, strike, expiry_index, is_call, fields:dict):
+
+        self.expirations = list(expirations)
+        self.strike = np.asarray(strike, dtype=np.float64)
+        self.expiry_index = np.asarray(expiry_index, dtype=np.int32)
+        self.is_call = np.asarray(is_call, dtype=bool)
+        self.fields = {name: np.asarray(fields[name], dtype=np.float64) for name in FIELDS}
+
+        self.strikes = np.unique(self.strike)
+        self.strike_index = np.searchsorted(self.strikes, self.strike).astype(np.int32)
+
+    @classmethod
+    def from_frames(cls, expirations, chains:dict):
+
+        """
+        builds the chain from {expiration: (calls, puts)} dataframes as returned by OptionDataProvider.fetch_chains
+        """
+
+        expirations = list(expirations)
+
+        frames = []
+
+        for (j, exp) in enumerate(expirations):
+            calls, puts = chains[exp]
+            frames.append(calls.assign(expiry_index=j, is_call=True))
+            frames.append(puts.assign(expiry_index=j, is_call=False))
+
+        quotes = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['strike', 'expiry_index', 'is_call'])
+
+        fields = {name: (quotes[column].to_numpy(dtype=np.float64) if column in quotes else np.full(len(quotes), np.nan))
+                  for (name, column) in FIELDS.items()}
+
+        return cls(expirations, quotes['strike'].to_numpy(dtype=np.float64), quotes['expiry_index'].to_numpy(),
+                   quotes['is_call'].to_numpy(dtype=bool), fields)
+
+    def __len__(self):
+
+        return self.strike.size
+
+    @property
+    def nbytes(self):
+
+        """
+        memory used by the quote arrays and the strike index
+        """
+
+        arrays = [self.strike, self.expiry_index, self.is_call, self.strikes, self.strike_index, *self.fields.values()]
+
+        return sum(a.nbytes for a in arrays)
+
+    def _select(self, option_type:str):
+
+        if option_type not in ("call", "put"):
+            raise ValueError(f"option_type must be 'call' or 'put', got {option_type}")
+
+        return self.is_call if option_type == "call" else ~self.is_call
+
+    def dense(self, field:str="last", option_type:str="call"):
+
+        """
+        returns a (len(strikes), len(expirations)) matrix of field, filled with a single vectorized scatter, NaN where not listed
+        """
+
+        mask = self._select(option_type)
+
+        matrix = np.full((self.strikes.size, len(self.expirations)), np.nan)
+        matrix[self.strike_index[mask], self.expiry_index[mask]] = self.fields[field][mask]
+
+        return matrix
+
+    def sparse(self, field:str="last", option_type:str="call"):
+
+        """
+        returns field as a scipy.sparse csr matrix over (strikes, expirations), only listed quotes are stored
+        (a listed quote of exactly 0 is kept as an explicit entry)
+        """
+
+        mask = self._select(option_type)
+
+        return sparse.csr_array((self.fields[field][mask], (self.strike_index[mask], self.expiry_index[mask])),
+                                shape=(self.strikes.size, len(self.expirations)))
@@ -0,0 +1,231 @@
+import time
+import zlib
+import threading
+from abc import ABC, abstractmethod
+import datetime as dt
+import numpy as np
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from options import compute_option_price_grid
+
+class RateLimiter:
+
+    """
+    spaces out calls so that at most one starts every min_interval seconds, shared between threads
+    """
+
+    def __init__(self, min_interval:float=0.0):
+
+        self.min_interval = min_interval
+        self.lock = threading.Lock()
+        self.next_start = 0.0
+
+    def wait(self):
+
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_start)
+            self.next_start = start + self.min_interval
+
+        if start > now:
+            time.sleep(start - now)
+
+class OptionDataProvider(ABC):
+
+    """
+    Description:
+
+    interface for option chain sources, subclasses implement expirations() and option_chain(),
+    fetch_chains() downloads every expiration concurrently on a bounded thread pool with retries
+
+    Parameters:
+
+    max_workers : int - number of expirations fetched at the same time
+    retries : int - attempts per expiration before the error is raised
+    backoff : float - seconds to wait after the first failed attempt, doubled after each further failure
+    min_interval : float - minimum number of seconds between the start of two requests (rate limit)
+    """
+
+    def __init__(self, max_workers:int=8, retries:int=3, backoff:float=0.5, min_interval:float=0.0):
+
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
+        self.rate_limiter = RateLimiter(min_interval)
+
+    @abstractmethod
+    def expirations(self, ticker:str):
+
+        """
+        returns the listed expirations of ticker as a tuple of "%Y-%m-%d" strings
+        """
+
+    @abstractmethod
+    def option_chain(self, ticker:str, expiration:str):
+
+        """
+        returns (calls, puts) dataframes for one expiration with at least the strike and lastPrice columns
+        """
+
+    def _fetch_with_retries(self, ticker:str, expiration:str):
+
+        delay = self.backoff
+
+        for attempt in range(self.retries):
+
+            self.rate_limiter.wait()
+
+            try:
+                return self.option_chain(ticker, expiration)
+            except Exception:
+                if attempt == self.retries - 1:
+                    raise
+                time.sleep(delay)
+                delay *= 2
+
+    def fetch_chains(self, ticker:str, expirations=None):
+
+        """
+        Returns:
+
+        expirations : tuple - expirations that were fetched
+        chains : dict - {expiration: (calls, puts)}
+        """
+
+        expirations = tuple(self.expirations(ticker) if expirations is None else expirations)
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(expirations)))) as pool:
+            results = pool.map(lambda exp: self._fetch_with_retries(ticker, exp), expirations)
+            chains = dict(zip(expirations, results))
+
+        return expirations, chains
+
+class YFinanceProvider(OptionDataProvider):
+
+    """
+    option chains from yfinance, requests for different expirations run concurrently
+
+    one yf.Ticker is kept per ticker and primed with its expirations, a fresh yf.Ticker would otherwise
+    download the expirations again before every option_chain request
+    """
+
+    def __init__(self, max_workers:int=8, retries:int=3, backoff:float=0.5, min_interval:float=0.05):
+
+        super().__init__(max_workers, retries, backoff, min_interval)
+
+        self.tickers = {}
+        self.tickers_lock = threading.Lock()
+
+    def _ticker(self, ticker:str, refresh:bool=False):
+
+        """
+        returns the yf.Ticker of ticker with its expirations loaded, a new one (with the current listings) when refresh is True
+        """
+
+        import yfinance as yf
+
+        with self.tickers_lock:
+
+            if refresh or ticker not in self.tickers:
+                handle = yf.Ticker(ticker)
+                handle.options
+                self.tickers[ticker] = handle
+
+            return self.tickers[ticker]
+
+    def expirations(self, ticker:str):
+
+        return tuple(self._ticker(ticker, refresh=True).options)
+
+    def option_chain(self, ticker:str, expiration:str):
+
+        chain = self._ticker(ticker).option_chain(expiration)
+
+        return chain.calls, chain.puts
+
+class FakeOptionProvider(OptionDataProvider):
+
+    """
+    Description:
+
+    offline stand-in that serves recorded chains, or synthetic Black-Scholes chains with a volatility smile and
+    missing quotes, so the dashboard and benchmarks can run without network access
+
+    Parameters:
+
+    S : float - price of the synthetic underlying
+    r : float - interest rate used to price the synthetic chains
+    sigma : float - at-the-money volatility of the synthetic chains
+    num_expirations : int - number of monthly expirations
+    strike_step : float - spacing between listed strikes
+    latency : float - seconds each option_chain call sleeps, to mimic a network round trip
+    seed : int - seed for the noise and the missing quotes
+    recorded : dict - {ticker: {expiration: (calls, puts)}} served instead of synthetic data when the ticker is present
+    """
+
+    def __init__(self, S:float=100, r:float=0.04, sigma:float=0.25, num_expirations:int=12, strike_step:float=5,
+                 latency:float=0.0, seed:int=0, recorded:dict=None, max_workers:int=8):
+
+        super().__init__(max_workers=max_workers, retries=1)
+
+        self.S = S
+        self.r = r
+        self.sigma = sigma
+        self.num_expirations = num_expirations
+        self.strike_step = strike_step
+        self.latency = latency
+        self.seed = seed
+        self.recorded = recorded or {}
+
+    def expirations(self, ticker:str):
+
+        if ticker in self.recorded:
+            return tuple(self.recorded[ticker])
+
+        today = dt.date.today()
+
+        # third friday of each of the next num_expirations months
+        expirations = []
+
+        for month in range(1, self.num_expirations + 1):
+            year, month_index = divmod(today.month - 1 + month, 12)
+            first = dt.date(today.year + year, month_index + 1, 1)
+            expirations.append((first + dt.timedelta(days=(4 - first.weekday()) % 7 + 14)).isoformat())
+
+        return tuple(expirations)
+
+    def option_chain(self, ticker:str, expiration:str):
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        if ticker in self.recorded:
+            return self.recorded[ticker][expiration]
+
+        T = (dt.date.fromisoformat(expiration) - dt.date.today()).days / 365.25
+
+        # wider strike range for longer expirations, like a listed chain
+        width = self.S * min(0.9, 0.3 + 0.5 * np.sqrt(T))
+        strikes = np.arange(np.floor((self.S - width) / self.strike_step), np.ceil((self.S + width) / self.strike_step) + 1) * self.strike_step
+        strikes = strikes[strikes > 0]
+
+        smile = self.sigma + 0.4 * np.log(strikes / self.S)**2
+
+        call, put = compute_option_price_grid(strikes, [T], self.S, 0, self.r, smile)
+
+        rng = np.random.default_rng([self.seed, zlib.crc32(ticker.encode()), int(expiration.replace('-', ''))])
+
+        def frame(prices):
+            prices = np.round(prices[:, 0] * (1 + 0.02 * rng.standard_normal(strikes.size)), 2)
+            spread = np.maximum(0.01, 0.02 * prices)
+            listed = rng.random(strikes.size) > 0.1
+            return pd.DataFrame({
+                                 'strike': strikes,
+                                 'lastPrice': prices,
+                                 'bid': np.maximum(prices - spread, 0),
+                                 'ask': prices + spread,
+                                 'volume': rng.integers(0, 5000, strikes.size),
+                                 'openInterest': rng.integers(0, 20000, strikes.size)
+                                })[listed].reset_index(drop=True)
+
+        return frame(call), frame(put)
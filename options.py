@@ -1,16 +1,14 @@
+import math
 import numpy as np
-import streamlit as st
 from scipy.stats import norm
+from scipy.special import ndtr
 
-@st.cache_data
 def BS_d1(S, K, T, t, r, sigma):
     return (np.log(S / K) + (r + 0.5 * sigma**2) * (T - t)) / (sigma * np.sqrt(T - t))
 
-@st.cache_data
 def BS_d2(T, t, sigma, d1):
     return d1 - sigma * np.sqrt(T - t)
 
-@st.cache_data
 def euro_call_price(S:float=100, K:float=100, T:float=1, t:float=0, r:float=0.05, sigma:float=0.05):
 
     """
@@ -33,7 +31,6 @@ def euro_call_price(S:float=100, K:float=100, T:float=1, t:float=0, r:float=0.05
 
     return call_price
 
-@st.cache_data
 def euro_put_price(S:float=100, K:float=100, T:float=1, t:float=0, r:float=0.05, sigma:float=0.05):
 
     """
@@ -55,20 +52,110 @@ def euro_put_price(S:float=100, K:float=100, T:float=1, t:float=0, r:float=0.05,
 
     return put_price
 
-@st.cache_data
-def compute_option_prices(strike_range, expiration_range, S, t, r, sigma):
+def _to_grid(value, shape):
+    """
+    reshape a scalar, per-row (len(strike_range),) or per-cell (len(strike_range), len(expiration_range)) input so it broadcasts against the strike x expiration grid
+    pass a (1, len(expiration_range)) array for a per-expiration value
+    """
+
+    value = np.asarray(value, dtype=float)
+
+    if value.ndim == 1:
+        if value.shape[0] != shape[0]:
+            raise ValueError(f"per-row input has length {value.shape[0]}, expected {shape[0]} (one per strike)")
+        return value[:, np.newaxis]
+
+    return value
+
+_INV_SQRT_2 = 1 / math.sqrt(2)
+_INV_SQRT_2PI = 1 / math.sqrt(2 * math.pi)
+
+def _norm_pdf(d):
+
+    return _INV_SQRT_2PI * np.exp(-0.5 * d * d)
+
+def _bs_terms(S, K, tau, r, sigma):
+    """
+    elementwise terms shared by the Black-Scholes prices and Greeks, the inputs broadcast together
+    (every pricer in the package goes through this and the price helpers below)
+    """
+
+    sqrt_tau = np.sqrt(tau)
+    vol_sqrt_tau = sigma * sqrt_tau
+
+    d1 = (np.log(S / K) + (r + 0.5 * sigma**2) * tau) / vol_sqrt_tau
+    d2 = d1 - vol_sqrt_tau
+
+    discount = np.exp(-r * tau)
+
+    return {'S': S, 'K': K, 'r': r, 'sigma': sigma, 'tau': tau, 'sqrt_tau': sqrt_tau, 'vol_sqrt_tau': vol_sqrt_tau,
+            'd1': d1, 'd2': d2, 'discount': discount, 'discounted_strike': K * discount}
 
-    call_prices = np.zeros((len(strike_range), len(expiration_range)))
-    put_prices = np.zeros((len(strike_range), len(expiration_range)))
+def _call_price(S, discounted_strike, d1, d2):
 
-    for (i, strike) in enumerate(strike_range):
-        for (j, expiration) in enumerate(expiration_range):
-            call_prices[i][j] = euro_call_price(S, strike, expiration, t, r, sigma)
-            put_prices[i][j] = euro_put_price(S, strike, expiration, t, r, sigma)
+    return S * ndtr(d1) - discounted_strike * ndtr(d2)
 
-    return call_prices, put_prices
+def _put_price(S, discounted_strike, d1, d2):
+
+    # N(-d) is evaluated directly, 1 - N(d) (or put-call parity) cancels to 0 for deep out-of-the-money puts
+    return discounted_strike * ndtr(-d2) - S * ndtr(-d1)
+
+def _vega(terms):
+    """
+    vega per unit of volatility (compute_greek_grid reports it per 1%)
+    """
+
+    return terms['S'] * _norm_pdf(terms['d1']) * terms['sqrt_tau']
+
+def _grid_terms(strike_range, expiration_range, S, t, r, sigma):
+    """
+    broadcast the inputs onto the strike x expiration grid and evaluate the terms shared by the prices and Greeks
+    """
+
+    K = np.asarray(strike_range, dtype=float)[:, np.newaxis]
+    T = np.asarray(expiration_range, dtype=float)[np.newaxis, :]
+
+    shape = (K.shape[0], T.shape[1])
+
+    terms = _bs_terms(_to_grid(S, shape), K, T - t, _to_grid(r, shape), _to_grid(sigma, shape))
+    terms['shape'] = shape
+
+    return terms
+
+def compute_option_price_grid(strike_range, expiration_range, S, t, r, sigma):
+
+    """
+    Description:
+
+    prices every strike x expiration pair at once by broadcasting the strikes (rows) against the expirations (columns),
+    call and put prices share a single d1/d2 evaluation
+
+    Parameters:
+
+    strike_range : array-like - strike prices (rows of the grid)
+    expiration_range : array-like - times to maturity in years (columns of the grid)
+    S : float or np.ndarray - current underlying stock price, scalar, per-row or per-cell
+    t : float - current time in years (from beginning of contract)
+    r : float or np.ndarray - interest rate, scalar, per-row or per-cell
+    sigma : float or np.ndarray - volatility, scalar, per-row or per-cell
+
+    Returns:
+
+    call_prices : np.ndarray (2d-array) - call prices with shape (len(strike_range), len(expiration_range))
+    put_prices : np.ndarray (2d-array) - put prices with shape (len(strike_range), len(expiration_range))
+    """
+
+    g = _grid_terms(strike_range, expiration_range, S, t, r, sigma)
+
+    call_prices = _call_price(g['S'], g['discounted_strike'], g['d1'], g['d2'])
+    put_prices = _put_price(g['S'], g['discounted_strike'], g['d1'], g['d2'])
+
+    return np.broadcast_to(call_prices, g['shape']).copy(), np.broadcast_to(put_prices, g['shape']).copy()
+
+def compute_option_prices(strike_range, expiration_range, S, t, r, sigma):
+
+    return compute_option_price_grid(strike_range, expiration_range, S, t, r, sigma)
 
-@st.cache_data
 def compute_greeks(S:float, K:float, T:float, t:float, r:float, sigma:float):
 
     """
@@ -105,7 +192,7 @@ def compute_greeks(S:float, K:float, T:float, t:float, r:float, sigma:float):
            }
 
     put = {
-            'Delta': cdf_d1 - 1,
+            'Delta': -cdf_neg_d1,
             'Gamma': gamma,
             'Theta': (-S * pdf_d1 * sigma / (2 * np.sqrt(T)) + r * K * np.exp(-r * T) * cdf_neg_d2) / 365,
             'Vega': vega,
@@ -114,19 +201,153 @@ def compute_greeks(S:float, K:float, T:float, t:float, r:float, sigma:float):
 
     return {'call': call, 'put': put}
 
-@st.cache_data
-def compute_greek_matrices(greek_name, S, r, sigma, strike_range, expiration_range):
+def price_single_option(S:float, K:float, T:float, t:float, r:float, sigma:float):
+
+    """
+    Description:
+
+    scalar fast path for quoting one contract, returns the call and put price with all 5 Greeks
+    using only the math module (no numpy/scipy dispatch), with the same units as compute_greeks
 
-    greeks_call = np.zeros((len(strike_range), len(expiration_range)))
-    greeks_put = np.zeros((len(strike_range), len(expiration_range)))
+    Latency budget: a single call should stay under 5 microseconds on CPython 3.11,
+    run `python benchmarks.py` to check it on the current machine
+
+    Parameters:
+    S : float - current underlying stock price
+    K : float - strike price
+    T : float - time to maturity in years
+    t : float - current time in years (from beginning of contract)
+    r : float - interest rate
+    sigma : float - volatility
+
+    Returns:
+    - Dictionary: {'call': {Price, Delta, Gamma, Theta, Vega, Rho}, 'put': {...}}
+    """
+
+    tau = T - t
+    sqrt_tau = math.sqrt(tau)
+    vol_sqrt_tau = sigma * sqrt_tau
+
+    d1 = (math.log(S / K) + (r + 0.5 * sigma * sigma) * tau) / vol_sqrt_tau
+    d2 = d1 - vol_sqrt_tau
+
+    pdf_d1 = _INV_SQRT_2PI * math.exp(-0.5 * d1 * d1)
+    cdf_d1 = 0.5 * math.erfc(-d1 * _INV_SQRT_2)
+    cdf_d2 = 0.5 * math.erfc(-d2 * _INV_SQRT_2)
+    # N(-d) is evaluated directly, 1 - N(d) cancels to 0 for deep out-of-the-money puts
+    cdf_neg_d1 = 0.5 * math.erfc(d1 * _INV_SQRT_2)
+    cdf_neg_d2 = 0.5 * math.erfc(d2 * _INV_SQRT_2)
+
+    discounted_strike = K * math.exp(-r * tau)
+
+    gamma = pdf_d1 / (S * vol_sqrt_tau)
+    vega = S * pdf_d1 * sqrt_tau / 100
+    theta_decay = -S * pdf_d1 * sigma / (2 * sqrt_tau)
+
+    call = {
+            'Price': S * cdf_d1 - discounted_strike * cdf_d2,
+            'Delta': cdf_d1,
+            'Gamma': gamma,
+            'Theta': (theta_decay - r * discounted_strike * cdf_d2) / 365,
+            'Vega': vega,
+            'Rho': discounted_strike * tau * cdf_d2 / 100
+           }
+
+    put = {
+            'Price': discounted_strike * cdf_neg_d2 - S * cdf_neg_d1,
+            'Delta': -cdf_neg_d1,
+            'Gamma': gamma,
+            'Theta': (theta_decay + r * discounted_strike * cdf_neg_d2) / 365,
+            'Vega': vega,
+            'Rho': -discounted_strike * tau * cdf_neg_d2 / 100
+          }
+
+    return {'call': call, 'put': put}
+
+def compute_greek_grid(strike_range, expiration_range, S, t, r, sigma, second_order:bool=False):
+
+    """
+    Description:
+
+    computes every Greek for calls and puts over the whole strike x expiration grid in one pass,
+    the pdf/cdf/discount terms are evaluated once and shared between all of them
+
+    Parameters:
+
+    strike_range : array-like - strike prices (rows of the grid)
+    expiration_range : array-like - times to maturity in years (columns of the grid)
+    S : float or np.ndarray - current underlying stock price, scalar, per-row or per-cell
+    t : float - current time in years (from beginning of contract)
+    r : float or np.ndarray - interest rate, scalar, per-row or per-cell
+    sigma : float or np.ndarray - volatility, scalar, per-row or per-cell
+    second_order : bool - also compute Vanna, Volga and Charm
+
+    Returns:
+
+    greeks : dict - {'call': {Delta, Gamma, Theta, Vega, Rho[, Vanna, Volga, Charm]}, 'put': {...}},
+                    each value is an np.ndarray with shape (len(strike_range), len(expiration_range))
+
+    Units follow compute_greeks: Theta and Charm per day, Vega, Rho, Vanna and Volga per 1% change
+    """
+
+    g = _grid_terms(strike_range, expiration_range, S, t, r, sigma)
+
+    S, K, r, sigma, tau = g['S'], g['K'], g['r'], g['sigma'], g['tau']
+    d1, d2 = g['d1'], g['d2']
+
+    pdf_d1 = norm.pdf(d1)
+    cdf_d1 = norm.cdf(d1)
+    cdf_d2 = norm.cdf(d2)
+    # N(-d) is evaluated directly, 1 - N(d) cancels to 0 for deep out-of-the-money puts
+    cdf_neg_d1 = norm.cdf(-d1)
+    cdf_neg_d2 = norm.cdf(-d2)
+
+    discounted_strike = g['discounted_strike']
+
+    gamma = pdf_d1 / (S * g['vol_sqrt_tau'])
+    vega = S * pdf_d1 * g['sqrt_tau'] / 100
+    theta_decay = -S * pdf_d1 * sigma / (2 * g['sqrt_tau'])
+
+    call = {
+            'Delta': cdf_d1,
+            'Gamma': gamma,
+            'Theta': (theta_decay - r * discounted_strike * cdf_d2) / 365,
+            'Vega': vega,
+            'Rho': (discounted_strike * tau * cdf_d2) / 100
+           }
+
+    put = {
+            'Delta': -cdf_neg_d1,
+            'Gamma': gamma,
+            'Theta': (theta_decay + r * discounted_strike * cdf_neg_d2) / 365,
+            'Vega': vega,
+            'Rho': (-discounted_strike * tau * cdf_neg_d2) / 100
+          }
+
+    if second_order:
+
+        # without dividends the call and put share the same second order Greeks
+        vanna = -pdf_d1 * d2 / sigma / 100
+        volga = vega * d1 * d2 / sigma / 100
+        charm = -pdf_d1 * (2 * r * tau - d2 * g['vol_sqrt_tau']) / (2 * tau * g['vol_sqrt_tau']) / 365
+
+        for greeks in (call, put):
+            greeks['Vanna'] = vanna
+            greeks['Volga'] = volga
+            greeks['Charm'] = charm
+
+    shape = g['shape']
+
+    return {
+            'call': {name: np.broadcast_to(value, shape).copy() for (name, value) in call.items()},
+            'put': {name: np.broadcast_to(value, shape).copy() for (name, value) in put.items()}
+           }
+
+def compute_greek_matrices(greek_name, S, r, sigma, strike_range, expiration_range):
 
-    for (i, strike) in enumerate(strike_range):
-        for (j, expiration) in enumerate(expiration_range):
-            greeks = compute_greeks(S, strike, expiration, 0, r, sigma)
-            greeks_call[i][j] = greeks["call"][greek_name]
-            greeks_put[i][j] = greeks["put"][greek_name]
+    greeks = compute_greek_grid(strike_range, expiration_range, S, 0, r, sigma)
 
-    return greeks_call, greeks_put
+    return greeks['call'][greek_name], greeks['put'][greek_name]
 
 def compute_call_pnl(K, call_price, prices):
     
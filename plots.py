@@ -205,11 +205,27 @@ def plot_BS_option_error(market_call_prices, market_put_prices, BS_call_prices,
 
     return fig
 
-def plot_greek(greek_name:str, S:float, t:float, r:float, sigma:float, strike_range, expiration_range, ticker):
+def plot_calibrated_option_error(call_residuals, put_residuals, strike_range, expiration_range, ticker):
 
-    expiration_range_years = str_date_to_years(expiration_range)
-    
-    greeks_call, greeks_put = compute_greek_matrices(greek_name, S, r, sigma, strike_range, expiration_range_years)
+    call_title = f"Calibrated Model Error for Call Options on {ticker} ($)"
+
+    put_title = f"Calibrated Model Error for Put Options on {ticker} ($)"
+
+    fig = get_option_matrices_heatmap_fig(call_residuals, put_residuals, strike_range, expiration_range, call_title, put_title)
+
+    return fig
+
+def plot_implied_volatility(call_iv, put_iv, strike_range, expiration_range, ticker):
+
+    call_title = f"Implied Volatility for Call Options on {ticker}"
+
+    put_title = f"Implied Volatility for Put Options on {ticker}"
+
+    fig = get_option_matrices_heatmap_fig(call_iv, put_iv, strike_range, expiration_range, call_title, put_title)
+
+    return fig
+
+def plot_greek_matrices(greek_name:str, greeks_call, greeks_put, strike_range, expiration_range, ticker):
 
     call_title = f"{greek_name} for Call Options on {ticker}"
 
@@ -217,6 +233,16 @@ def plot_greek(greek_name:str, S:float, t:float, r:float, sigma:float, strike_ra
 
     fig = get_option_matrices_heatmap_fig(greeks_call, greeks_put, strike_range, expiration_range, call_title, put_title)
 
+    return fig
+
+def plot_greek(greek_name:str, S:float, t:float, r:float, sigma:float, strike_range, expiration_range, ticker):
+
+    expiration_range_years = str_date_to_years(expiration_range)
+    
+    greeks_call, greeks_put = compute_greek_matrices(greek_name, S, r, sigma, strike_range, expiration_range_years)
+
+    fig = plot_greek_matrices(greek_name, greeks_call, greeks_put, strike_range, expiration_range, ticker)
+
     return fig, greeks_call, greeks_put
 
 def plot_pnl(K:int=100, T:int=1, S:float=100, call_price:float=0, put_price:float=0):
@@ -249,4 +275,33 @@ def plot_pnl(K:int=100, T:int=1, S:float=100, call_price:float=0, put_price:floa
 
     # plt.show()
 
-    return fig
\ No newline at end of file
+    return fig
+
+def plot_strategy_pnl(strategy, S:float=100, r:float=0.05, sigma:float=0.2, title:str="Strategy PnL"):
+
+    # the grid starts one step above 0 where the log-moneyness of the Black-Scholes values is undefined
+    prices = np.linspace(0, 2*S, 401)[1:]
+
+    _, expiry_pnl = strategy.expiry_pnl(prices)
+
+    _, current_pnl = strategy.pnl(prices, r, sigma)
+
+    height = 6
+
+    width = 2*height
+
+    fig, ax = plt.subplots(figsize=(width, height))
+
+    ax.plot(prices, expiry_pnl, label='PnL at Expiry')
+    ax.plot(prices, current_pnl, label='PnL Today', ls=':')
+
+    for break_even in strategy.break_evens():
+        ax.axvline(break_even, label=f"Break-even: {break_even:.2f}", ls='--', color='black')
+
+    ax.axhline(0, color='grey', lw=0.5)
+    ax.set_xlabel('Underlying Price ($)')
+    ax.set_ylabel('Profit ($)')
+    ax.set_title(title)
+    ax.legend()
+
+    return fig
@@ -19,7 +19,7 @@ def remove_majority_na(call_prices, put_prices, exp_start_index, exp_end_index,
     valid_rows = valid_rows_call & valid_rows_put
 
     filtered_call_prices = call_prices_sliced[valid_rows]
-    filtered_put_prices = call_prices_sliced[valid_rows]
+    filtered_put_prices = put_prices_sliced[valid_rows]
 
     # print(call_prices_sliced, put_prices_sliced, filtered_call_prices, filtered_put_prices)
 
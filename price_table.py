@@ -0,0 +1,245 @@
+import os
+import json
+import numpy as np
+from scipy.special import ndtr
+from options import euro_call_price
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "black_scholes", "price_table.npy")
+
+def _normalized_call(x, v):
+
+    """
+    call price divided by sqrt(F * K) * exp(-r * tau), as a function of the log-moneyness x = log(F / K) and the total
+    volatility v = sigma * sqrt(tau), symmetric in the sense that c(-x, v) = c(x, v) - 2 * sinh(x / 2)
+    """
+
+    d1 = x / v + 0.5 * v
+
+    return np.exp(0.5 * x) * ndtr(d1) - np.exp(-0.5 * x) * ndtr(d1 - v)
+
+class PriceTable:
+
+    """
+    Description:
+
+    approximate Black-Scholes pricer for bulk runs (risk sweeps, scenario cubes) where throughput matters more than the
+    last decimal, the normalized call price is tabulated once on a grid of log-moneyness x (uniform in x) by total
+    volatility v (uniform in sqrt(v), which puts more nodes where the price curves the most) and every option is then
+    priced with a bilinear interpolation instead of two normal cdf evaluations
+
+    options with |x| > x_max or v outside [v_min, v_max] are priced exactly with options.euro_call_price
+
+    max_error is the largest interpolation error measured at the cell centres when the table was built, in units of
+    sqrt(F * K) * exp(-r * tau) (about the spot price for options near the money), the default table (2049 x 513,
+    8 MB) has max_error of about 2e-5, ex. within $0.002 for an option on a $100 stock
+
+    build it with PriceTable.build(), persist it with save() and reopen it memory-mapped with PriceTable.load(),
+    or use get_price_table() which does all three
+    """
+
+    def __init__(self, table, x_max:float, v_min:float, v_max:float, max_error:float):
+
+        self.table = table
+        self.x_max = x_max
+        self.v_min = v_min
+        self.v_max = v_max
+        self.max_error = max_error
+
+        self.num_x, self.num_v = table.shape
+
+        self.x_step = 2 * x_max / (self.num_x - 1)
+        self.u_min = np.sqrt(v_min)
+        self.u_step = (np.sqrt(v_max) - self.u_min) / (self.num_v - 1)
+
+    @classmethod
+    def build(cls, x_max:float=2.0, v_min:float=0.01, v_max:float=2.0, num_x:int=2049, num_v:int=513):
+
+        """
+        Parameters:
+
+        x_max : float - largest |log(F / K)| in the table
+        v_min : float - smallest total volatility sigma * sqrt(tau) in the table
+        v_max : float - largest total volatility in the table
+        num_x : int - number of log-moneyness nodes
+        num_v : int - number of total volatility nodes
+
+        Returns:
+
+        table : PriceTable - in memory table with its measured max_error
+        """
+
+        x = np.linspace(-x_max, x_max, num_x)
+        u = np.linspace(np.sqrt(v_min), np.sqrt(v_max), num_v)
+
+        table = _normalized_call(x[:, np.newaxis], u[np.newaxis, :]**2)
+
+        # bilinear interpolation is least accurate at the centre of a cell, where it is the mean of the four corners
+        x_mid = 0.5 * (x[:-1] + x[1:])
+        u_mid = 0.5 * (u[:-1] + u[1:])
+
+        approx = 0.25 * (table[:-1, :-1] + table[1:, :-1] + table[:-1, 1:] + table[1:, 1:])
+        max_error = float(np.max(np.abs(approx - _normalized_call(x_mid[:, np.newaxis], u_mid[np.newaxis, :]**2))))
+
+        return cls(table, x_max, v_min, v_max, max_error)
+
+    def save(self, path:str=DEFAULT_PATH):
+
+        """
+        writes the table to path (.npy) and its grid bounds and max_error to a .json file next to it
+        """
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        np.save(path, np.ascontiguousarray(self.table))
+
+        with open(os.path.splitext(path)[0] + ".json", "w") as f:
+            json.dump({'x_max': self.x_max, 'v_min': self.v_min, 'v_max': self.v_max, 'max_error': self.max_error}, f, indent=2)
+
+    @classmethod
+    def load(cls, path:str=DEFAULT_PATH):
+
+        """
+        opens a table written by save(), the values are memory-mapped rather than read into memory
+        """
+
+        with open(os.path.splitext(path)[0] + ".json") as f:
+            metadata = json.load(f)
+
+        return cls(np.load(path, mmap_mode='r'), **metadata)
+
+    def _interpolate(self, S, K, tau, r, sigma, out):
+
+        """
+        interpolated call prices of one chunk of flat arrays written into out, returns the mask of options inside the table
+        """
+
+        x = np.log(S / K)
+        x += r * tau
+
+        # fractional grid positions, the total volatility axis is uniform in sqrt(v)
+        i = (x + self.x_max) / self.x_step
+        j = np.sqrt(tau)
+        j *= sigma
+        np.sqrt(j, out=j)
+        j -= self.u_min
+        j /= self.u_step
+
+        in_table = (i >= 0) & (i <= self.num_x - 1) & (j >= 0) & (j <= self.num_v - 1)
+
+        i0 = i.astype(np.intp)
+        j0 = j.astype(np.intp)
+        np.clip(i0, 0, self.num_x - 2, out=i0)
+        np.clip(j0, 0, self.num_v - 2, out=j0)
+
+        i -= i0
+        j -= j0
+
+        # flat index of the lower left corner of every cell, the four corners are gathered from the raveled table
+        corner = i0 * self.num_v
+        corner += j0
+
+        values = np.asarray(self.table).reshape(-1)
+
+        lower = values.take(corner)
+        corner += 1
+        lower_right = values.take(corner)
+        corner += self.num_v
+        upper_right = values.take(corner)
+        corner -= 1
+        upper = values.take(corner)
+
+        lower_right -= lower
+        lower_right *= j
+        lower += lower_right
+
+        upper_right -= upper
+        upper_right *= j
+        upper += upper_right
+
+        upper -= lower
+        upper *= i
+        lower += upper
+
+        # sqrt(F * K) * exp(-r * tau) = K * exp(x / 2 - r * tau)
+        x *= 0.5
+        x -= r * tau
+        np.exp(x, out=x)
+        x *= K
+
+        np.multiply(lower, x, out=out)
+
+        return in_table
+
+    def call_prices(self, S, K, T, t, r, sigma, chunk_size:int=2**16):
+
+        """
+        Parameters:
+
+        S : float or np.ndarray - current underlying stock price
+        K : float or np.ndarray - strike price
+        T : float or np.ndarray - time to maturity in years
+        t : float or np.ndarray - current time in years (from beginning of contract)
+        r : float or np.ndarray - interest rate
+        sigma : float or np.ndarray - volatility
+        chunk_size : int - options interpolated per pass, chunks small enough to stay in cache are what make the
+                     table faster than the exact formula (about 2-3x on a few million random options)
+
+        all inputs are broadcast together
+
+        Returns:
+
+        call_prices : np.ndarray - approximate call prices with the broadcast shape of the inputs
+        """
+
+        S, K, T, t, r, sigma = np.broadcast_arrays(*(np.asarray(a, dtype=float) for a in (S, K, T, t, r, sigma)))
+
+        shape = S.shape
+
+        S, K, T, t, r, sigma = (a.reshape(-1) for a in (S, K, T, t, r, sigma))
+        tau = T - t
+
+        prices = np.empty(S.size)
+
+        for start in range(0, S.size, chunk_size):
+
+            part = slice(start, start + chunk_size)
+
+            in_table = self._interpolate(S[part], K[part], tau[part], r[part], sigma[part], prices[part])
+
+            if not in_table.all():
+                outside = np.flatnonzero(~in_table) + start
+                prices[outside] = euro_call_price(S[outside], K[outside], T[outside], t[outside], r[outside], sigma[outside])
+
+        return prices.reshape(shape)
+
+    def put_prices(self, S, K, T, t, r, sigma):
+
+        """
+        approximate put prices from the interpolated call prices and put-call parity (same inputs as call_prices)
+        """
+
+        call_prices = self.call_prices(S, K, T, t, r, sigma)
+
+        tau = np.asarray(T, dtype=float) - t
+
+        return call_prices - S + K * np.exp(-np.asarray(r, dtype=float) * tau)
+
+# loaded table per path
+_tables = {}
+
+def get_price_table(path:str=DEFAULT_PATH):
+
+    """
+    returns the shared price table of path (memory-mapped), the table is built and saved there the first time
+    """
+
+    table = _tables.get(path)
+
+    if table is None:
+
+        if not os.path.exists(path):
+            PriceTable.build().save(path)
+
+        table = _tables[path] = PriceTable.load(path)
+
+    return table
@@ -0,0 +1,134 @@
+import numpy as np
+from scipy.special import ndtr
+from options import _to_grid, _norm_pdf, _call_price, _put_price
+
+class PricingSurface:
+
+    """
+    Description:
+
+    prices and Greeks over a fixed strike x expiration grid that can be repriced cheaply when only the spot moves,
+    every term that does not depend on S (log K, discount factors, sigma * sqrt(T - t), ...) is computed once in __init__
+
+    Parameters:
+
+    strike_range : array-like - strike prices (rows of the grid)
+    expiration_range : array-like - times to maturity in years (columns of the grid)
+    t : float - current time in years (from beginning of contract)
+    r : float or np.ndarray - interest rate, scalar, per-row or per-cell
+    sigma : float or np.ndarray - volatility, scalar, per-row or per-cell
+
+    Usage:
+
+    surface = PricingSurface(strike_range, expiration_range, 0, r, sigma)
+    values = surface.update(S)                      # full reprice
+    values = surface.update(S_tick, taylor=True)    # delta-gamma update for tiny moves
+    values['call']['Price'], values['put']['Delta'], ...
+    """
+
+    def __init__(self, strike_range, expiration_range, t:float, r, sigma):
+
+        K = np.asarray(strike_range, dtype=float)[:, np.newaxis]
+        T = np.asarray(expiration_range, dtype=float)[np.newaxis, :]
+
+        self.shape = (K.shape[0], T.shape[1])
+
+        r = _to_grid(r, self.shape)
+        sigma = _to_grid(sigma, self.shape)
+
+        tau = T - t
+        sqrt_tau = np.sqrt(tau)
+
+        self.vol_sqrt_tau = sigma * sqrt_tau
+        self.log_K_minus_drift = np.log(K) - (r + 0.5 * sigma**2) * tau
+        self.discounted_strike = K * np.exp(-r * tau)
+
+        # S-independent factors of the Greeks, kept in the units of compute_greek_grid
+        self.theta_factor = -sigma / (2 * sqrt_tau) / 365
+        self.rate_theta = r * self.discounted_strike / 365
+        self.vega_factor = sqrt_tau / 100
+        self.rho_factor = self.discounted_strike * tau / 100
+
+        self.S = None
+        self.values = None
+
+    def _full_reprice(self, S:float):
+
+        d1 = (np.log(S) - self.log_K_minus_drift) / self.vol_sqrt_tau
+        d2 = d1 - self.vol_sqrt_tau
+
+        call_price = _call_price(S, self.discounted_strike, d1, d2)
+        put_price = _put_price(S, self.discounted_strike, d1, d2)
+
+        pdf_d1 = _norm_pdf(d1)
+        cdf_d1 = ndtr(d1)
+        cdf_d2 = ndtr(d2)
+        # N(-d) is evaluated directly, 1 - N(d) cancels to 0 for deep out-of-the-money puts
+        cdf_neg_d1 = ndtr(-d1)
+        cdf_neg_d2 = ndtr(-d2)
+
+        gamma = pdf_d1 / (S * self.vol_sqrt_tau)
+        vega = S * pdf_d1 * self.vega_factor
+        theta_decay = S * pdf_d1 * self.theta_factor
+
+        call = {
+                'Price': call_price,
+                'Delta': cdf_d1,
+                'Gamma': gamma,
+                'Theta': theta_decay - self.rate_theta * cdf_d2,
+                'Vega': vega,
+                'Rho': self.rho_factor * cdf_d2
+               }
+
+        put = {
+                'Price': put_price,
+                'Delta': -cdf_neg_d1,
+                'Gamma': gamma,
+                'Theta': theta_decay + self.rate_theta * cdf_neg_d2,
+                'Vega': vega,
+                'Rho': -self.rho_factor * cdf_neg_d2
+              }
+
+        shape = self.shape
+
+        return {
+                'call': {name: np.broadcast_to(value, shape) for (name, value) in call.items()},
+                'put': {name: np.broadcast_to(value, shape) for (name, value) in put.items()}
+               }
+
+    def update(self, S:float, taylor:bool=False, max_move:float=1e-3):
+
+        """
+        Parameters:
+
+        S : float - new underlying stock price
+        taylor : bool - for moves smaller than max_move (relative to the last full reprice) update Price and Delta
+                        with a delta-gamma expansion instead of repricing, the other Greeks keep their last values
+        max_move : float - largest relative spot move handled by the expansion
+
+        Returns:
+
+        values : dict - {'call': {Price, Delta, Gamma, Theta, Vega, Rho}, 'put': {...}} of np.ndarrays over the grid
+        """
+
+        if taylor and self.values is not None and abs(S / self.S - 1) < max_move:
+
+            dS = S - self.S
+
+            values = {}
+
+            for side in ('call', 'put'):
+
+                anchor = self.values[side]
+                gamma = anchor['Gamma']
+
+                values[side] = dict(anchor)
+                values[side]['Price'] = anchor['Price'] + anchor['Delta'] * dS + 0.5 * gamma * dS**2
+                values[side]['Delta'] = anchor['Delta'] + gamma * dS
+
+            return values
+
+        self.S = S
+        self.values = self._full_reprice(S)
+
+        return self.values
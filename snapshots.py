@@ -0,0 +1,175 @@
+import os
+import json
+import datetime as dt
+import numpy as np
+import pandas as pd
+from option_chain import OptionChain, FIELDS
+from history_store import COLUMNS
+
+MANIFEST = "manifest.json"
+
+def _save(directory:str, name:str, array):
+
+    np.save(os.path.join(directory, f"{name}.npy"), np.ascontiguousarray(array))
+
+def write_snapshot(directory:str, risk_free_rate:float, stock_data:dict=None, option_chains:dict=None):
+
+    """
+    Description:
+
+    persists market data as one .npy file per array plus a JSON manifest, so it can be replayed later with SnapshotReader
+
+    Parameters:
+
+    directory : str - snapshot directory (created if missing)
+    risk_free_rate : float - value returned by get_risk_free_rate
+    stock_data : dict - {ticker: dataframe returned by get_stock_data}, a ValueError is raised for empty dataframes
+    option_chains : dict - {ticker: OptionChain}
+
+    Returns:
+
+    manifest : dict - contents of the manifest that was written
+    """
+
+    stock_data = stock_data or {}
+    option_chains = option_chains or {}
+
+    os.makedirs(directory, exist_ok=True)
+
+    manifest = {
+                'created': dt.datetime.now().isoformat(timespec='seconds'),
+                'risk_free_rate': float(risk_free_rate),
+                'history': [],
+                'chains': {}
+               }
+
+    for (ticker, frame) in stock_data.items():
+
+        if frame.empty:
+            raise ValueError(f"no history for {ticker} (get_stock_data returns an empty dataframe for invalid tickers)")
+
+        if isinstance(frame.columns, pd.MultiIndex):
+            frame = frame.droplevel(1, axis=1)
+
+        folder = os.path.join(directory, ticker)
+        os.makedirs(folder, exist_ok=True)
+
+        _save(folder, "history_dates", frame.index.to_numpy(dtype='datetime64[ns]'))
+        _save(folder, "history_values", frame[COLUMNS].to_numpy(dtype=np.float64))
+
+        manifest['history'].append(ticker)
+
+    for (ticker, chain) in option_chains.items():
+
+        folder = os.path.join(directory, ticker)
+        os.makedirs(folder, exist_ok=True)
+
+        _save(folder, "chain_strike", chain.strike)
+        _save(folder, "chain_expiry_index", chain.expiry_index)
+        _save(folder, "chain_is_call", chain.is_call)
+
+        for (name, values) in chain.fields.items():
+            _save(folder, f"chain_{name}", values)
+
+        manifest['chains'][ticker] = chain.expirations
+
+    with open(os.path.join(directory, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    return manifest
+
+def record_snapshot(directory:str, tickers, start_date:dt.datetime=None, provider=None):
+
+    """
+    downloads history, the risk free rate and the option chains of tickers with the live functions and writes them to directory,
+    invalid tickers (no history) are skipped
+    """
+
+    from stock_data import get_stock_data, get_risk_free_rate
+    from option_providers import YFinanceProvider
+
+    start_date = dt.datetime.today() - dt.timedelta(days=365) if start_date is None else start_date
+    provider = YFinanceProvider() if provider is None else provider
+
+    stock_data = {}
+    option_chains = {}
+
+    for ticker in tickers:
+
+        history = get_stock_data(ticker, start_date)
+
+        if history.empty:
+            print(f"Skipping {ticker}, no history available\n")
+            continue
+
+        stock_data[ticker] = history
+
+        expirations, chains = provider.fetch_chains(ticker)
+        option_chains[ticker] = OptionChain.from_frames(expirations, chains)
+
+    return write_snapshot(directory, get_risk_free_rate(), stock_data, option_chains)
+
+class SnapshotReader:
+
+    """
+    Description:
+
+    replays a snapshot written by write_snapshot through the same functions as stock_data
+    (get_stock_data, get_risk_free_rate, get_option_data), arrays are memory-mapped so loading does not copy them
+
+    Parameters:
+
+    directory : str - snapshot directory
+    """
+
+    def __init__(self, directory:str):
+
+        self.directory = directory
+
+        with open(os.path.join(directory, MANIFEST)) as f:
+            self.manifest = json.load(f)
+
+    def _load(self, ticker:str, name:str):
+
+        return np.load(os.path.join(self.directory, ticker, f"{name}.npy"), mmap_mode='r')
+
+    def get_risk_free_rate(self):
+
+        return self.manifest['risk_free_rate']
+
+    def get_stock_data(self, ticker:str, start_date:dt.datetime=None):
+
+        """
+        returns the recorded bars from start_date on, shaped like yf.download, or an empty dataframe for unknown tickers
+        """
+
+        if ticker not in self.manifest['history']:
+            return pd.DataFrame()
+
+        dates = self._load(ticker, "history_dates")
+        values = self._load(ticker, "history_values")
+
+        first = 0 if start_date is None else np.searchsorted(dates, np.datetime64(start_date, 'ns'))
+
+        index = pd.DatetimeIndex(dates[first:], name='Date')
+        columns = pd.MultiIndex.from_product([COLUMNS, [ticker]], names=['Price', 'Ticker'])
+
+        return pd.DataFrame(values[first:], index=index, columns=columns, copy=False)
+
+    def get_option_chain(self, ticker:str):
+
+        fields = {name: self._load(ticker, f"chain_{name}") for name in FIELDS}
+
+        return OptionChain(self.manifest['chains'][ticker], self._load(ticker, "chain_strike"),
+                           self._load(ticker, "chain_expiry_index"), self._load(ticker, "chain_is_call"), fields)
+
+    def get_option_data(self, ticker:str):
+
+        """
+        Returns:
+        call_prices, put_prices, strikes and expirations like stock_data.get_option_data
+        """
+
+        chain = self.get_option_chain(ticker)
+
+        return chain.dense('last', 'call'), chain.dense('last', 'put'), chain.strikes.tolist(), chain.expirations
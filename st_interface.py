@@ -1,10 +1,27 @@
 import streamlit as st
 import bisect
+import datetime as dt
 import numpy as np
-from stock_data import get_bs_parameters, get_option_data
-from plots import plot_BS_option_prices, plot_market_option_prices, plot_BS_option_error, plot_greek, plot_pnl
+from stock_data import get_bs_parameters, get_option_data, get_stock_data, get_history_store
+from volatility_methods import compute_volatility_report
+from caching import cached, cache_stats
+from plots import plot_BS_option_prices, plot_market_option_prices, plot_BS_option_error, plot_calibrated_option_error, plot_implied_volatility, plot_greek_matrices, plot_pnl
+from options import compute_greek_grid, price_single_option
+from implied_volatility import compute_implied_volatility_grid
+from date_functions import str_date_to_years
+from yield_curve import get_yield_curve
+from volatility_surface import VolatilitySurface
+from calibration import calibrate_volatility
 from price_filter import remove_majority_na
 
+# -----cache coarse-grained calls (downloads and whole grids only)-----
+# spot and volatility change during the day, chains even faster, grids are pure functions of their inputs
+get_bs_parameters = cached(get_bs_parameters, ttl=5 * 60)
+get_option_data = cached(get_option_data, ttl=60)
+compute_greek_grid = cached(compute_greek_grid)
+compute_implied_volatility_grid = cached(compute_implied_volatility_grid)
+compute_volatility_report = cached(compute_volatility_report, ttl=5 * 60)
+
 # -----wide mode-----
 st.set_page_config(layout="wide")
 
@@ -51,7 +68,13 @@ st.sidebar.markdown("### Pricing Settings")
 
 st.sidebar.text_input('Ticker Symbol:', key='ticker', value='AAPL')
 
-volatility_method = st.sidebar.selectbox('Method to Compute Volatility:', ['std', 'log', 'ewma', 'log ewma'])
+volatility_method = st.sidebar.selectbox('Method to Compute Volatility:', ['std', 'log', 'ewma', 'log ewma', 'garch', 'log garch',
+                                                                           'parkinson', 'garman klass', 'rogers satchell', 'yang zhang'])
+
+if st.sidebar.button("Refresh Market Data"):
+    get_history_store().expire(st.session_state.ticker)
+    get_bs_parameters.invalidate()
+    get_option_data.invalidate()
 
 r, sigma, S = get_bs_parameters(ticker=st.session_state.ticker, volatility_method=volatility_method, output=False)
 
@@ -94,6 +117,13 @@ if valid_input:
                                                       value=(strikes[strike_lower_index - 2], strikes[strike_lower_index + 4]))
     
     remove_na = st.sidebar.checkbox("Omit Strikes Without Listed Prices")
+
+    show_iv = st.sidebar.checkbox("Show Implied Volatility")
+
+    use_surface = st.sidebar.checkbox("Price with Fitted Volatility Surface")
+
+    calibration = st.sidebar.selectbox("Calibrate Volatility to Market Prices",
+                                       ("None", "Single Volatility", "Volatility Term Structure"))
     
     strike_start_index = strikes.index(strike_min)
     strike_end_index = strikes.index(strike_max)
@@ -144,9 +174,37 @@ if valid_input:
     st.write(f"Underlying volatility: {sigma:.4f}" )
     st.write(f"Current Price of {st.session_state.ticker}: ${S:.2f}")
 
+    with st.expander("Compare Volatility Estimators"):
+        history = get_stock_data(st.session_state.ticker, dt.datetime.today() - dt.timedelta(days=365))
+        st.dataframe(compute_volatility_report(history))
+
+    # per-expiration risk free rates interpolated from the cached yield curve, shape (1, len(expiration_range))
+    expiration_range_years = str_date_to_years(expiration_range)
+    r_expiry = get_yield_curve().rates(expiration_range_years)[np.newaxis, :]
+
+    # -----fit the volatility surface-----
+
+    # prices, Greeks and the single-option quote all use the fitted surface when there is one, the flat sigma otherwise
+    surface = None
+
+    if use_surface:
+
+        # one SVI slice per listed expiration, fitted to the call implied volatilities of the whole chain
+        all_expirations_years = str_date_to_years(expirations)
+        all_r_expiry = get_yield_curve().rates(all_expirations_years)[np.newaxis, :]
+
+        chain_iv, _ = compute_implied_volatility_grid(live_call_prices, strikes, all_expirations_years, S, 0, all_r_expiry, "call")
+
+        try:
+            surface = VolatilitySurface.fit(chain_iv, strikes, all_expirations_years, S, all_r_expiry)
+        except ValueError as error:
+            st.warning(f"Could not fit a volatility surface ({error}), pricing with the flat volatility {sigma:.4f} instead")
+
+    pricing_sigma = sigma if surface is None else surface.grid(strike_range, expiration_range_years)
+
     # -----plot theoretical prices-----
 
-    price_fig, call_prices, put_prices = plot_BS_option_prices(S, 0, r, sigma, st.session_state.ticker, strike_range, expiration_range)
+    price_fig, call_prices, put_prices = plot_BS_option_prices(S, 0, r_expiry, pricing_sigma, st.session_state.ticker, strike_range, expiration_range)
 
     # with st.container(height=600):
     st.pyplot(price_fig)
@@ -166,6 +224,33 @@ if valid_input:
 
     st.pyplot(error_fig)
 
+    # -----plot error after calibration-----
+
+    if calibration != "None":
+
+        calibrated = calibrate_volatility(market_call_prices, market_put_prices, strike_range, expiration_range_years, S, 0, r_expiry,
+                                          term_structure=(calibration == "Volatility Term Structure"), initial=sigma)
+
+        calibrated_sigma = np.ravel(calibrated['sigma'])
+
+        st.write(f"Calibrated volatility: {', '.join(f'{s:.4f}' for s in calibrated_sigma)} "
+                 f"(RMSE ${calibrated['rmse']:.4f})")
+
+        calibrated_fig = plot_calibrated_option_error(calibrated['call_residuals'], calibrated['put_residuals'], strike_range, expiration_range, st.session_state.ticker)
+
+        st.pyplot(calibrated_fig)
+
+    # -----plot implied volatility-----
+
+    if show_iv:
+
+        call_iv, _ = compute_implied_volatility_grid(market_call_prices, strike_range, expiration_range_years, S, 0, r_expiry, "call")
+        put_iv, _ = compute_implied_volatility_grid(market_put_prices, strike_range, expiration_range_years, S, 0, r_expiry, "put")
+
+        iv_fig = plot_implied_volatility(call_iv, put_iv, strike_range, expiration_range, st.session_state.ticker)
+
+        st.pyplot(iv_fig)
+
     # continue focus settings
 
     if single_view:
@@ -174,40 +259,49 @@ if valid_input:
 
         T = st.sidebar.select_slider(f"Expiration", options=expiration_range)
 
-        strike_index = strike_range.index(K)
+        # quote the selected contract through the scalar fast path
+        T_years = str_date_to_years([T])[0]
 
-        expiration_index = expiration_range.index(T)
+        quote_sigma = sigma if surface is None else float(surface.vol(K, T_years))
 
-        call_price = call_prices[strike_index][expiration_index]
+        quote = price_single_option(S, K, T_years, 0, float(get_yield_curve().rates(T_years)), quote_sigma)
 
-        put_price = put_prices[strike_index][expiration_index]
+        call_price = quote['call']['Price']
+
+        put_price = quote['put']['Price']
 
     # -----plot greeks-----
 
-    delta_fig, delta_call, delta_put = plot_greek("Delta", S, 0, r, sigma, strike_range, expiration_range, st.session_state.ticker)
-    gamma_fig, gamma_call, gamma_put = plot_greek("Gamma", S, 0, r, sigma, strike_range, expiration_range, st.session_state.ticker)
-    theta_fig, theta_call, theta_put = plot_greek("Theta", S, 0, r, sigma, strike_range, expiration_range, st.session_state.ticker)
-    vega_fig, vega_call, vega_put = plot_greek("Vega", S, 0, r, sigma, strike_range, expiration_range, st.session_state.ticker)
-    rho_fig, rho_call, rho_put = plot_greek("Rho", S, 0, r, sigma, strike_range, expiration_range, st.session_state.ticker)
+    show_greeks = show_delta or show_gamma or show_rho or show_theta or show_vega
+
+    if show_greeks:
+
+        # all five Greeks come from a single pass over the grid
+        greeks = compute_greek_grid(strike_range, expiration_range_years, S, 0, r_expiry, pricing_sigma)
+
+        delta_call, delta_put = greeks['call']['Delta'], greeks['put']['Delta']
+        gamma_call, gamma_put = greeks['call']['Gamma'], greeks['put']['Gamma']
+        theta_call, theta_put = greeks['call']['Theta'], greeks['put']['Theta']
+        vega_call, vega_put = greeks['call']['Vega'], greeks['put']['Vega']
+        rho_call, rho_put = greeks['call']['Rho'], greeks['put']['Rho']
 
-    if show_delta or show_gamma or show_rho or show_theta or show_vega:
         st.markdown("---")
         st.markdown("## The Greeks")
 
     if show_delta:
-        st.pyplot(delta_fig)
+        st.pyplot(plot_greek_matrices("Delta", delta_call, delta_put, strike_range, expiration_range, st.session_state.ticker))
 
     if show_gamma:
-        st.pyplot(gamma_fig)
+        st.pyplot(plot_greek_matrices("Gamma", gamma_call, gamma_put, strike_range, expiration_range, st.session_state.ticker))
 
     if show_theta:
-        st.pyplot(theta_fig)
+        st.pyplot(plot_greek_matrices("Theta", theta_call, theta_put, strike_range, expiration_range, st.session_state.ticker))
 
     if show_vega:
-        st.pyplot(vega_fig)
+        st.pyplot(plot_greek_matrices("Vega", vega_call, vega_put, strike_range, expiration_range, st.session_state.ticker))
 
     if show_rho:
-        st.pyplot(rho_fig)
+        st.pyplot(plot_greek_matrices("Rho", rho_call, rho_put, strike_range, expiration_range, st.session_state.ticker))
 
     # Plot PnL
 
@@ -221,23 +315,31 @@ if valid_input:
         with col_call:
             st.markdown("### Call")
             st.write(f"Price: ${call_price:.4f}")
-            st.markdown(f"Δ<sub>c</sub> = {delta_call[strike_index][expiration_index]:.4f}", unsafe_allow_html=True)
-            st.markdown(f"Γ<sub>c</sub> = {gamma_call[strike_index][expiration_index]:.4f}", unsafe_allow_html=True)
-            st.markdown(f"Θ<sub>c</sub> = {theta_call[strike_index][expiration_index]:.4f}", unsafe_allow_html=True)
-            st.markdown(f"ν<sub>c</sub> = {vega_call[strike_index][expiration_index]:.4f}", unsafe_allow_html=True)
-            st.markdown(f"ρ<sub>c</sub> = {rho_call[strike_index][expiration_index]:.4f}", unsafe_allow_html=True)
+            st.markdown(f"Δ<sub>c</sub> = {quote['call']['Delta']:.4f}", unsafe_allow_html=True)
+            st.markdown(f"Γ<sub>c</sub> = {quote['call']['Gamma']:.4f}", unsafe_allow_html=True)
+            st.markdown(f"Θ<sub>c</sub> = {quote['call']['Theta']:.4f}", unsafe_allow_html=True)
+            st.markdown(f"ν<sub>c</sub> = {quote['call']['Vega']:.4f}", unsafe_allow_html=True)
+            st.markdown(f"ρ<sub>c</sub> = {quote['call']['Rho']:.4f}", unsafe_allow_html=True)
 
         with col_put:
             st.markdown("### Put")
             st.write(f"Price: ${put_price:.4f}")
-            st.markdown(f"Δ<sub>c</sub> = {delta_put[strike_index][expiration_index]:.4f}", unsafe_allow_html=True)
-            st.markdown(f"Γ<sub>c</sub> = {gamma_put[strike_index][expiration_index]:.4f}", unsafe_allow_html=True)
-            st.markdown(f"Θ<sub>c</sub> = {theta_put[strike_index][expiration_index]:.4f}", unsafe_allow_html=True)
-            st.markdown(f"ν<sub>c</sub> = {vega_put[strike_index][expiration_index]:.4f}", unsafe_allow_html=True)
-            st.markdown(f"ρ<sub>c</sub> = {rho_put[strike_index][expiration_index]:.4f}", unsafe_allow_html=True)
+            st.markdown(f"Δ<sub>c</sub> = {quote['put']['Delta']:.4f}", unsafe_allow_html=True)
+            st.markdown(f"Γ<sub>c</sub> = {quote['put']['Gamma']:.4f}", unsafe_allow_html=True)
+            st.markdown(f"Θ<sub>c</sub> = {quote['put']['Theta']:.4f}", unsafe_allow_html=True)
+            st.markdown(f"ν<sub>c</sub> = {quote['put']['Vega']:.4f}", unsafe_allow_html=True)
+            st.markdown(f"ρ<sub>c</sub> = {quote['put']['Rho']:.4f}", unsafe_allow_html=True)
 
         pnl_fig = plot_pnl(K, T, S, call_price, put_price)
         st.pyplot(pnl_fig)
 
 else:
     st.write('ticker does not exist')
+
+# -----cache statistics-----
+
+with st.sidebar.expander("Cache Statistics"):
+    stats = cache_stats()
+    st.write(f"{stats['total']['bytes'] / 2**20:.1f} MB of {stats['total']['max_bytes'] / 2**20:.0f} MB, "
+             f"{stats['total']['entries']} entries, hit rate {stats['total']['hit_rate']:.0%}")
+    st.table({name.split('.')[-1]: values for (name, values) in stats.items() if name != 'total'})
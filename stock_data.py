@@ -1,47 +1,84 @@
 import yfinance as yf
+from yfinance.exceptions import YFTickerMissingError
+import threading
 import datetime as dt
 import pandas as pd
 import numpy as np
-import streamlit as st
-from volatility_methods import compute_std_dev, compute_ewma_volatility
+from volatility_methods import compute_std_dev, compute_ewma_volatility, compute_garch_volatility, compute_range_volatility_from_data, compute_std_dev_columns, compute_ewma_volatility_columns
+from history_store import HistoryStore
+from option_providers import OptionDataProvider, YFinanceProvider
+from option_chain import OptionChain
+from yield_curve import get_yield_curve
 
-@st.cache_data
 def ticker_exists(ticker_symbol):
+    """
+    returns False when yahoo has no price data for ticker_symbol, network errors are raised instead of being
+    reported as an invalid ticker
+    """
 
     try:
-        ticker = yf.Ticker(ticker_symbol)
-        info = ticker.info
-    except:
+        yf.Ticker(ticker_symbol).history(period="5d", raise_errors=True)
+    except YFTickerMissingError:
         return False
-        raise NameError(f"----------Ticker {ticker_symbol} does not exist----------")
-    return True  
+    return True
+
+# range-based estimators use the whole OHLC bar and reach the accuracy of close-to-close estimates with far fewer bars
+RANGE_METHODS = ('parkinson', 'garman klass', 'rogers satchell', 'yang zhang')
+
+RANGE_HISTORY_DAYS = 120
+
+_history_store = None
+_history_store_lock = threading.Lock()
 
-@st.cache_data
-def get_stock_data(ticker:str, start_date:dt.datetime):
+def get_history_store():
     """
-    returns pandas dataframe with Close, High, Low, Open, and Volume columns if ticker exists
-    returns empty dataframe if ticker does not exist
+    returns the shared on-disk OHLC store (opened on first use), the same store is handed to every thread
     """
 
-    end_date = dt.datetime.today()
+    global _history_store
 
-    if not ticker_exists(ticker):
-        print(f"\n{ticker} is not a valid ticker symbol, please try again")
-        return pd.DataFrame()
+    with _history_store_lock:
+
+        if _history_store is None:
+            _history_store = HistoryStore()
+
+    return _history_store
+
+def download_stock_data(ticker:str, start_date, end_date):
 
     print(f"Starting download for {ticker}...\n")
 
-    stock_data = yf.download(ticker, start_date, end_date, auto_adjust=True, ) if ticker_exists(ticker) else None
+    # actions=True adds the Dividends and Stock Splits columns the history store uses to detect a change of adjustment basis
+    stock_data = yf.download(ticker, start_date, end_date, auto_adjust=True, actions=True)
 
     print(f"\nFinished downloading\n")
 
     return stock_data
 
-@st.cache_data
-def get_volatility(stock_data:pd.DataFrame, method:str="log"):
+def get_stock_data(ticker:str, start_date:dt.datetime, store:HistoryStore=None):
+    """
+    returns pandas dataframe with Close, High, Low, Open, and Volume columns if ticker exists
+    returns empty dataframe if ticker does not exist
+
+    bars are served from the on-disk history store, only bars newer than the last stored date are downloaded
+    (all of them again after a split or dividend, since the stored bars are adjusted)
+    """
+
+    store = get_history_store() if store is None else store
+
+    if not store.ticker_is_valid(ticker, ticker_exists):
+        print(f"\n{ticker} is not a valid ticker symbol, please try again")
+        return pd.DataFrame()
+
+    stock_data = store.get_history(ticker, start_date, download_stock_data)
+
+    return stock_data
+
+def get_volatility(stock_data:pd.DataFrame, method:str="log", ticker:str=None):
     """
     returns best estimate for Black-Scholes volatility (i.e constant over time)
-    methods: log, std, ewma, log ewma, garch, log garch
+    methods: log, std, ewma, log ewma, garch, log garch, parkinson, garman klass, rogers satchell, yang zhang
+    ticker is only used to warm start the garch fits from the previous fit of the same ticker
     """
     
     print(f"Computing volatility based on {method} method\n")
@@ -54,38 +91,39 @@ def get_volatility(stock_data:pd.DataFrame, method:str="log"):
         return compute_ewma_volatility(stock_data, "std")
     elif method == "log ewma":
         return compute_ewma_volatility(stock_data, "log")
+    elif method == "garch":
+        return compute_garch_volatility(stock_data, "std", ticker=ticker)
+    elif method == "log garch":
+        return compute_garch_volatility(stock_data, "log", ticker=ticker)
+    elif method in RANGE_METHODS:
+        return compute_range_volatility_from_data(stock_data, method)
 
     return -1
 
-@st.cache_data
 def get_risk_free_rate():
     """
-    returns the risk free rate obtained from 3-month US t-bill
+    returns the risk free rate obtained from 3-month US t-bill (read off the cached yield curve)
     """
-    t_bill = yf.Ticker("^IRX")
-
-    print("Retrieving risk free rate from 3-month US t-bill\n")
 
-    rate = t_bill.history(period="5d")["Close"].iloc[-1]
+    return float(get_yield_curve().rates(0.25))
 
-    return rate / 100  # Convert from percent to decimal
-
-@st.cache_data
 def get_current_price(stock_data, ticker):
 
     print(f"Retreiving current price of {ticker}\n")
 
-    current_price = stock_data['Close'].to_numpy()[0][-1]
+    # last row (most recent bar) of the single Close column
+    current_price = stock_data['Close'].to_numpy()[-1][0]
 
     return current_price
 
-@st.cache_data
 def get_bs_parameters(ticker:str='AAPL', volatility_method:str='log', time:int=1, output:bool=True):
     """
     Parameters:
     ticker : str - ticker symbol for stock
-    volatility_method : str - method to compute volatility (methods: log, std, ewma, log ewma, garch, log garch)
-    time : int - time in history to compute volatility in years (ex. time=1, voltatility is computed from 1 yr of historical data)
+    volatility_method : str - method to compute volatility (methods: log, std, ewma, log ewma, garch, log garch,
+                              parkinson, garman klass, rogers satchell, yang zhang)
+    time : int - time in history to compute volatility in years (ex. time=1, voltatility is computed from 1 yr of historical data),
+                 range-based methods use the last RANGE_HISTORY_DAYS days instead
 
     Returns:
     r : float - risk free rate (obtained from 3-month US t-bills)
@@ -93,7 +131,9 @@ def get_bs_parameters(ticker:str='AAPL', volatility_method:str='log', time:int=1
     S : float - current price of underlying (ticker)
     """
 
-    start_date = dt.datetime.today() - dt.timedelta(days=365)
+    history_days = RANGE_HISTORY_DAYS if volatility_method in RANGE_METHODS else int(365 * time)
+
+    start_date = dt.datetime.today() - dt.timedelta(days=history_days)
 
     stock_data = get_stock_data(ticker=ticker, start_date=start_date)
 
@@ -103,7 +143,7 @@ def get_bs_parameters(ticker:str='AAPL', volatility_method:str='log', time:int=1
 
     r = get_risk_free_rate()
 
-    sigma = get_volatility(stock_data=stock_data, method=volatility_method)
+    sigma = get_volatility(stock_data=stock_data, method=volatility_method, ticker=ticker)
 
     S = get_current_price(stock_data=stock_data, ticker=ticker)
 
@@ -112,62 +152,105 @@ def get_bs_parameters(ticker:str='AAPL', volatility_method:str='log', time:int=1
 
     return r, sigma, S
 
-@st.cache_data
-def get_option_data(ticker):
-    
+def get_volatility_columns(closes, method:str="log"):
+    """
+    returns the volatility of every column of closes (2d-array, one column per ticker) computed in a single vectorized pass
+    methods: log, std, ewma, log ewma
     """
+
+    if method == "std":
+        return compute_std_dev_columns(closes, "std")
+    elif method == "log":
+        return compute_std_dev_columns(closes, "log")
+    elif method == "ewma":
+        return compute_ewma_volatility_columns(closes, "std")
+    elif method == "log ewma":
+        return compute_ewma_volatility_columns(closes, "log")
+
+    return np.full(np.shape(closes)[1], -1.0)
+
+def download_closes(tickers, start_date, end_date, chunk_size:int=100):
+    """
+    returns a dataframe of close prices (dates x tickers) downloaded with one multi-ticker request per chunk of tickers
+    """
+
+    frames = []
+
+    for start in range(0, len(tickers), chunk_size):
+
+        chunk = list(tickers[start:start + chunk_size])
+
+        print(f"Starting download for {len(chunk)} tickers...\n")
+
+        data = yf.download(chunk, start_date, end_date, auto_adjust=True, progress=False, threads=True)
+
+        frames.append(data['Close'])
+
+    closes = pd.concat(frames, axis=1) if frames else pd.DataFrame()
+
+    return closes.reindex(columns=list(tickers))
+
+def get_bs_parameters_batch(tickers, volatility_method:str='log', chunk_size:int=100, closes:pd.DataFrame=None):
+    """
+    Parameters:
+    tickers : list - ticker symbols
+    volatility_method : str - method to compute volatility (methods: log, std, ewma, log ewma)
+    chunk_size : int - tickers per download request
+    closes : pd.DataFrame - optional close prices (dates x tickers) to use instead of downloading
+
     Returns:
-    expirations
-    call_prices
-    put_prices
+    parameters : pd.DataFrame - r, sigma and S per ticker (index), rows are NaN for tickers without data
     """
 
-    # select ticker and get expirations
-    underlying = yf.Ticker(ticker)
-    expirations = underlying.options
+    tickers = list(tickers)
+
+    if closes is None:
+        start_date = dt.datetime.today() - dt.timedelta(days=365)
+        closes = download_closes(tickers, start_date, dt.datetime.today(), chunk_size)
 
-    # initialize dictionary for call and put strikes and prices
-    call_data = {}
-    put_data = {}
-    strikes = {'call': {}, 'put':{}}
+    closes = closes.reindex(columns=tickers)
 
-    for exp in expirations:
+    values = closes.to_numpy(dtype=float)
 
-        # get option chain at exp, keep strike and last price
-        chain = underlying.option_chain(exp)
-        calls = chain.calls[['strike', 'lastPrice']]
-        puts = chain.puts[['strike', 'lastPrice']]
+    r = get_risk_free_rate()
+
+    sigma = get_volatility_columns(values, volatility_method)
 
-        # Keep strikes that exist in both calls and puts for this expiration
-        call_strikes = set(calls['strike'])
-        put_strikes = set(puts['strike'])
+    # most recent valid close of every column
+    has_data = ~np.isnan(values)
+    last_row = has_data.shape[0] - 1 - np.argmax(has_data[::-1], axis=0)
+    S = np.where(has_data.any(axis=0), values[last_row, np.arange(values.shape[1])], np.nan)
 
-        # strikes = call_strikes & put_strikes
-        strikes['call'][exp] = call_strikes
-        strikes['put'][exp] = put_strikes
+    parameters = pd.DataFrame({'r': r, 'sigma': sigma, 'S': S}, index=pd.Index(tickers, name='Ticker'))
+    parameters.loc[~has_data.any(axis=0)] = np.nan
 
-        # store call and put data
-        call_data[exp] = calls.set_index('strike')['lastPrice']
-        put_data[exp] = puts.set_index('strike')['lastPrice']  
+    return parameters
+
+def get_option_data(ticker, provider:OptionDataProvider=None):
+    
+    """
+    Parameters:
+    ticker : str - ticker symbol for stock
+    provider : OptionDataProvider - source of the option chains (defaults to yfinance, chains are fetched concurrently)
 
-    # get key for longest set of strikes
-    call_key = max(strikes['call'], key=len)
-    put_key = max(strikes['put'], key=len)
+    Returns:
+    expirations
+    call_prices
+    put_prices
+    """
 
-    # get longest set of strikes
-    call_strikes = strikes['call'][call_key]
-    put_strikes = strikes['put'][put_key]
+    provider = YFinanceProvider() if provider is None else provider
 
-    # combine them to cover all possible strikes
-    combined_strikes = sorted(call_strikes | put_strikes)
+    # fetch the chain of every expiration concurrently
+    expirations, chains = provider.fetch_chains(ticker)
+    expirations = list(expirations)
 
-    call_prices = np.zeros((len(combined_strikes), len(expirations)))
-    put_prices = np.zeros((len(combined_strikes), len(expirations)))
+    # store every quote in contiguous arrays and scatter them over the union of all listed strikes
+    chain = OptionChain.from_frames(expirations, chains)
 
-    for i, strike in enumerate(combined_strikes):
-        for j, exp in enumerate(expirations):
+    call_prices = chain.dense('last', 'call')
+    put_prices = chain.dense('last', 'put')
 
-            call_prices[i][j] = call_data[exp].get(strike, np.nan)
-            put_prices[i][j] = put_data[exp].get(strike, np.nan)
+    combined_strikes = chain.strikes.tolist()
 
     return call_prices, put_prices, combined_strikes, expirations
\ No newline at end of file
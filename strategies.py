@@ -0,0 +1,224 @@
+import numpy as np
+from options import _bs_terms, _call_price, _put_price
+
+def _leg_payoffs(prices, kinds, strikes):
+
+    """
+    expiry value of one unit of every leg at every price, shape (len(prices), len(kinds))
+    """
+
+    prices = np.asarray(prices, dtype=float)[:, np.newaxis]
+    kinds = np.asarray(kinds)
+    strikes = np.asarray(strikes, dtype=float)
+
+    call = np.maximum(prices - strikes, 0)
+    put = np.maximum(strikes - prices, 0)
+
+    return np.where(kinds == 'call', call, np.where(kinds == 'put', put, prices))
+
+def _leg_values(prices, kinds, strikes, taus, r:float, sigma:float):
+
+    """
+    Black-Scholes value of one unit of every leg at every price with taus years left, shape (len(prices), len(kinds))
+    """
+
+    prices = np.asarray(prices, dtype=float)[:, np.newaxis]
+    kinds = np.asarray(kinds)
+    strikes = np.asarray(strikes, dtype=float)
+    taus = np.asarray(taus, dtype=float)
+
+    live = taus > 0
+    tau = np.where(live, taus, 1.0)
+
+    # stock legs have no strike and a price of 0 has no log-moneyness, both are replaced by values that keep the logs
+    # finite (the stock value is the price itself and the option values at a tiny price are their limits at 0)
+    safe_prices = np.maximum(prices, np.finfo(float).tiny)
+    safe_strikes = np.where(kinds == 'stock', 1.0, strikes)
+
+    terms = _bs_terms(safe_prices, safe_strikes, tau, r, sigma)
+
+    call = _call_price(prices, terms['discounted_strike'], terms['d1'], terms['d2'])
+    put = _put_price(prices, terms['discounted_strike'], terms['d1'], terms['d2'])
+
+    value = np.where(kinds == 'call', call, np.where(kinds == 'put', put, prices))
+
+    return np.where(live | (kinds == 'stock'), value, _leg_payoffs(prices[:, 0], kinds, strikes))
+
+def screen_strategies(prices, kinds, strikes, quantities, premiums):
+
+    """
+    Description:
+
+    expiry P&L of many strategies built from the same set of legs with a single matrix product
+
+    Parameters:
+
+    prices : array-like - underlying prices at expiry
+    kinds : array-like - 'call', 'put' or 'stock' per leg
+    strikes : array-like - strike per leg (ignored for stock)
+    quantities : np.ndarray (2d-array) - signed quantity of each leg in each strategy, shape (n_strategies, n_legs)
+    premiums : array-like - price paid per unit of each leg (the purchase price for stock)
+
+    Returns:
+
+    pnl : np.ndarray (2d-array) - P&L with shape (n_strategies, len(prices))
+    """
+
+    quantities = np.atleast_2d(np.asarray(quantities, dtype=float))
+
+    cost = quantities @ np.asarray(premiums, dtype=float)
+
+    return quantities @ _leg_payoffs(prices, kinds, strikes).T - cost[:, np.newaxis]
+
+class Strategy:
+
+    """
+    Description:
+
+    multi-leg option strategy (long/short calls, puts and stock) evaluated as array operations over all legs at once
+
+    Usage:
+
+    spread = Strategy()
+    spread.add_leg('call', 100, 0.5, 1, premium=6.1)
+    spread.add_leg('call', 110, 0.5, -1, premium=2.4)
+    prices, pnl = spread.expiry_pnl(np.linspace(50, 150, 1001))
+    """
+
+    def __init__(self):
+
+        self.kinds = []
+        self.strikes = []
+        self.expirations = []
+        self.quantities = []
+        self.premiums = []
+
+    def add_leg(self, kind:str, strike:float=0.0, expiration:float=0.0, quantity:float=1.0, premium:float=0.0):
+
+        """
+        Parameters:
+
+        kind : str - call, put or stock
+        strike : float - strike price (ignored for stock)
+        expiration : float - time to maturity in years (ignored for stock)
+        quantity : float - signed quantity, negative for short legs
+        premium : float - price paid per unit (the purchase price for stock)
+
+        Returns:
+
+        self, so legs can be chained
+        """
+
+        if kind not in ("call", "put", "stock"):
+            raise ValueError(f"kind must be 'call', 'put' or 'stock', got {kind}")
+
+        self.kinds.append(kind)
+        self.strikes.append(0.0 if kind == "stock" else float(strike))
+        self.expirations.append(float(expiration))
+        self.quantities.append(float(quantity))
+        self.premiums.append(float(premium))
+
+        return self
+
+    @property
+    def cost(self):
+
+        """
+        net premium paid to open the strategy (negative for a net credit)
+        """
+
+        return float(np.dot(self.quantities, self.premiums))
+
+    def _check_single_expiry(self):
+
+        """
+        raises a ValueError when the option legs expire on different dates, the expiry P&L is only defined when they expire together
+        """
+
+        expirations = {T for (kind, T) in zip(self.kinds, self.expirations) if kind != "stock"}
+
+        if len(expirations) > 1:
+            raise ValueError(f"option legs expire at {sorted(expirations)}, the expiry P&L needs a single expiration "
+                             f"(use pnl with days_elapsed for calendar and diagonal spreads)")
+
+    def expiry_pnl(self, prices):
+
+        """
+        returns the prices and the P&L at expiry of every leg over them, every option leg must share one expiration
+        """
+
+        self._check_single_expiry()
+
+        prices = np.asarray(prices, dtype=float)
+
+        return prices, _leg_payoffs(prices, self.kinds, self.strikes) @ np.asarray(self.quantities) - self.cost
+
+    def pnl(self, prices, r:float, sigma:float, days_elapsed:float=0):
+
+        """
+        returns the prices and the Black-Scholes P&L after days_elapsed days (legs that have expired by then use their payoff)
+        """
+
+        prices = np.asarray(prices, dtype=float)
+        taus = np.asarray(self.expirations) - days_elapsed / 365
+
+        values = _leg_values(prices, self.kinds, self.strikes, taus, r, sigma)
+
+        return prices, values @ np.asarray(self.quantities) - self.cost
+
+    def _kinks(self):
+
+        """
+        prices where the expiry P&L changes slope, with 0 prepended, and the slope beyond the last one
+        """
+
+        option_strikes = [K for (kind, K) in zip(self.kinds, self.strikes) if kind != "stock"]
+        kinks = np.unique(np.concatenate([[0.0], option_strikes]))
+
+        # above every strike only calls and stock still move with the price
+        right_slope = sum(q for (kind, q) in zip(self.kinds, self.quantities) if kind in ("call", "stock"))
+
+        return kinks, right_slope
+
+    def break_evens(self):
+
+        """
+        returns the underlying prices where the expiry P&L crosses zero, found exactly since the P&L is piecewise linear
+        """
+
+        kinks, right_slope = self._kinks()
+
+        # one extra point past the last kink captures a crossing on the right tail
+        points = np.append(kinks, kinks[-1] + max(kinks[-1], 1.0))
+        _, values = self.expiry_pnl(points)
+
+        left, right = values[:-1], values[1:]
+        crossing = (np.sign(left) != np.sign(right)) & (left != 0)
+
+        x0, x1 = points[:-1][crossing], points[1:][crossing]
+        y0, y1 = left[crossing], right[crossing]
+
+        roots = list(x0 - y0 * (x1 - x0) / (y1 - y0))
+
+        # a root exactly on a kink shows up as a zero value
+        roots += list(points[values == 0])
+
+        if values[-1] != 0 and right_slope != 0 and np.sign(values[-1]) != np.sign(right_slope):
+            roots.append(points[-1] - values[-1] / right_slope)
+
+        return np.unique(np.round(roots, 10))
+
+    def max_profit_loss(self):
+
+        """
+        returns (max profit, max loss) at expiry, +/- np.inf when the P&L is unbounded above the highest strike
+        """
+
+        kinks, right_slope = self._kinks()
+
+        _, values = self.expiry_pnl(kinks)
+
+        max_profit = np.inf if right_slope > 0 else values.max()
+        max_loss = -np.inf if right_slope < 0 else values.min()
+
+        return float(max_profit), float(max_loss)
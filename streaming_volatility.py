@@ -0,0 +1,204 @@
+import math
+from collections import deque
+from abc import ABC, abstractmethod
+
+class StreamingVolatility(ABC):
+
+    """
+    Description:
+
+    base class for volatility estimators that ingest one price at a time in O(1) time and memory,
+    subclasses implement _add_return() and volatility (daily volatility of the returns seen so far)
+
+    Parameters:
+
+    method : str - std (simple returns) or log
+    """
+
+    def __init__(self, method:str="log"):
+
+        if method not in ("std", "log"):
+            raise ValueError(f"method must be 'std' or 'log', got {method}")
+
+        self.method = method
+        self.last_price = None
+        self.count = 0
+
+    def update(self, price:float):
+
+        """
+        ingests the next price and returns the annualized volatility (nan until enough returns were seen)
+        """
+
+        if self.last_price is not None:
+            ret = price / self.last_price - 1 if self.method == "std" else math.log(price / self.last_price)
+            self.count += 1
+            self._add_return(ret)
+
+        self.last_price = price
+
+        return self.annualized_volatility
+
+    def update_many(self, prices):
+
+        for price in prices:
+            self.update(price)
+
+        return self.annualized_volatility
+
+    @abstractmethod
+    def _add_return(self, ret:float):
+
+        """
+        folds the newest return (self.count already includes it) into the estimator state
+        """
+
+    @property
+    @abstractmethod
+    def volatility(self):
+
+        """
+        daily volatility of the returns seen so far
+        """
+
+    @property
+    def annualized_volatility(self):
+
+        return self.volatility * math.sqrt(252)
+
+    def state(self):
+
+        """
+        returns a JSON serializable checkpoint of the estimator
+        """
+
+        return {'class': type(self).__name__, **self.__dict__}
+
+    @classmethod
+    def from_state(cls, state:dict):
+
+        """
+        restores an estimator from a checkpoint made by state()
+        """
+
+        state = dict(state)
+        kind = state.pop('class')
+
+        estimator_cls = next(c for c in [cls, *_subclasses(StreamingVolatility)] if c.__name__ == kind)
+
+        estimator = estimator_cls.__new__(estimator_cls)
+        estimator.__dict__.update(state)
+        estimator._restore()
+
+        return estimator
+
+    def _restore(self):
+
+        """
+        hook to rebuild attributes that are not stored as plain JSON values
+        """
+
+def _subclasses(cls):
+
+    return [sub for direct in cls.__subclasses__() for sub in (direct, *_subclasses(direct))]
+
+class WelfordVolatility(StreamingVolatility):
+
+    """
+    sample standard deviation of every return seen so far (Welford's online algorithm), matches compute_std_dev
+    """
+
+    def __init__(self, method:str="log"):
+
+        super().__init__(method)
+
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def _add_return(self, ret:float):
+
+        delta = ret - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (ret - self.mean)
+
+    @property
+    def volatility(self):
+
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else math.nan
+
+class EWMAVolatility(StreamingVolatility):
+
+    """
+    RiskMetrics volatility, variance = lambda * variance + (1 - lambda) * return^2 (zero mean), seeded with the first squared return
+    """
+
+    def __init__(self, method:str="log", lambda_:float=0.94):
+
+        super().__init__(method)
+
+        self.lambda_ = lambda_
+        self.variance = math.nan
+
+    def _add_return(self, ret:float):
+
+        if self.count == 1:
+            self.variance = ret * ret
+        else:
+            self.variance = self.lambda_ * self.variance + (1 - self.lambda_) * ret * ret
+
+    @property
+    def volatility(self):
+
+        return math.sqrt(self.variance)
+
+class RollingVolatility(StreamingVolatility):
+
+    """
+    sample standard deviation of the last window returns, the oldest return is removed with a reverse Welford step
+    """
+
+    def __init__(self, method:str="log", window:int=21):
+
+        super().__init__(method)
+
+        self.window = window
+        self.returns = deque(maxlen=window)
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def _add_return(self, ret:float):
+
+        if len(self.returns) == self.window:
+
+            old = self.returns[0]
+            n = len(self.returns)
+
+            # remove the oldest return, then add the new one
+            old_mean = self.mean
+            self.mean = (n * old_mean - old) / (n - 1) if n > 1 else 0.0
+            self.m2 -= (old - old_mean) * (old - self.mean)
+
+        self.returns.append(ret)
+
+        n = len(self.returns)
+        delta = ret - self.mean
+        self.mean += delta / n
+        self.m2 += delta * (ret - self.mean)
+
+    @property
+    def volatility(self):
+
+        n = len(self.returns)
+
+        return math.sqrt(max(self.m2, 0.0) / (n - 1)) if n > 1 else math.nan
+
+    def state(self):
+
+        state = super().state()
+        state['returns'] = list(self.returns)
+
+        return state
+
+    def _restore(self):
+
+        self.returns = deque(self.returns, maxlen=self.window)
@@ -1,8 +1,8 @@
 import pandas as pd
 import numpy as np
-import streamlit as st
+from scipy.signal import lfilter
+from scipy.optimize import minimize
 
-@st.cache_data
 def compute_returns(stock_data, method:str="log"):
     
     # use a new df to avoid changing original stock_data since pd.DataFrame() get passed by reference
@@ -17,7 +17,6 @@ def compute_returns(stock_data, method:str="log"):
     
     return  returns_df         
 
-@st.cache_data
 def compute_std_dev(stock_data, method:str="log"):
 
     returns = compute_returns(stock_data, method)
@@ -32,7 +31,6 @@ def compute_std_dev(stock_data, method:str="log"):
 
     return annualized_volatility
 
-@st.cache_data
 def compute_ewma_volatility(stock_data, method:str="log"):
     
     returns = compute_returns(stock_data, method)
@@ -49,4 +47,349 @@ def compute_ewma_volatility(stock_data, method:str="log"):
 
     annualized_volatility = daily_volatility * np.sqrt(252)
 
-    return annualized_volatility
\ No newline at end of file
+    return annualized_volatility
+
+def compute_returns_matrix(closes, method:str="log"):
+
+    """
+    Parameters:
+
+    closes : np.ndarray (2d-array) - close prices with one column per ticker (NaN before a ticker's first bar)
+    method : str - std (simple returns) or log
+
+    Returns:
+
+    returns : np.ndarray (2d-array) - returns with shape (len(closes) - 1, number of tickers), NaN where either close is missing
+    """
+
+    closes = np.asarray(closes, dtype=float)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = closes[1:] / closes[:-1]
+
+    return ratio - 1 if method == "std" else np.log(ratio)
+
+def _std_dev_from_returns(returns):
+
+    """
+    daily sample standard deviation of every column of a returns matrix, NaN entries are skipped
+    """
+
+    return np.nanstd(returns, axis=0, ddof=1)
+
+def _ewma_from_returns(returns, lambda_:float=0.94):
+
+    """
+    daily EWMA standard deviation of every column of a returns matrix, same as pandas ewm(span).std().iloc[-1]
+    on the column with its NaN entries dropped (adjust=True with bias correction)
+    """
+
+    valid = ~np.isnan(returns)
+    x = np.where(valid, returns, 0)
+
+    span = 2 / (1 - lambda_) - 1
+    alpha = 2 / (span + 1)
+
+    # weight of each valid return by how many valid returns come after it in its column
+    age = np.cumsum(valid[::-1], axis=0)[::-1] - 1
+    w = np.where(valid, (1 - alpha) ** age, 0)
+
+    sum_w = w.sum(axis=0)
+    sum_w2 = (w**2).sum(axis=0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = (w * x).sum(axis=0) / sum_w
+        biased_var = (w * (x - mean)**2).sum(axis=0) / sum_w
+        var = biased_var * sum_w**2 / (sum_w**2 - sum_w2)
+
+    return np.sqrt(var)
+
+def compute_std_dev_columns(closes, method:str="log"):
+
+    """
+    annualized volatility of every column of closes in one vectorized pass, matches compute_std_dev column by column
+    """
+
+    returns = compute_returns_matrix(closes, method)
+
+    return _std_dev_from_returns(returns) * np.sqrt(252)
+
+def compute_ewma_volatility_columns(closes, method:str="log", lambda_:float=0.94):
+
+    """
+    annualized EWMA volatility of every column of closes in one vectorized pass, matches compute_ewma_volatility
+    (pandas ewm(span).std() with adjust=True and bias correction) column by column
+    """
+
+    returns = compute_returns_matrix(closes, method)
+
+    return _ewma_from_returns(returns, lambda_) * np.sqrt(252)
+
+def _garch_variances(params, returns, initial_variance):
+
+    """
+    conditional variances of a GARCH(1,1) and their gradient with respect to (omega, alpha, beta),
+    every recursion is a first order linear filter so it runs through scipy.signal.lfilter instead of a python loop
+    """
+
+    omega, alpha, beta = params
+
+    squared = returns[:-1]**2
+    zi = [beta * initial_variance]
+
+    variances = lfilter([1], [1, -beta], omega + alpha * squared, zi=zi)[0]
+
+    lagged = np.concatenate([[initial_variance], variances[:-1]])
+
+    d_omega = lfilter([1], [1, -beta], np.ones_like(squared))
+    d_alpha = lfilter([1], [1, -beta], squared)
+    d_beta = lfilter([1], [1, -beta], lagged)
+
+    return variances, np.stack([d_omega, d_alpha, d_beta])
+
+def _garch_negative_log_likelihood(params, returns, initial_variance):
+
+    variances, gradient = _garch_variances(params, returns, initial_variance)
+
+    variances = np.maximum(variances, 1e-12)
+    squared = returns[1:]**2
+
+    nll = 0.5 * np.sum(np.log(variances) + squared / variances)
+    d_nll = 0.5 * gradient @ (1 / variances - squared / variances**2)
+
+    return nll, d_nll
+
+def fit_garch(returns, initial=None):
+
+    """
+    Description:
+
+    maximum likelihood fit of a GARCH(1,1), variance_t = omega + alpha * return_{t-1}^2 + beta * variance_{t-1},
+    using the analytic gradient of the likelihood
+
+    Parameters:
+
+    returns : np.ndarray - daily returns (demeaned inside)
+    initial : tuple - (omega, alpha, beta) to warm start from, ex. the previous fit of the same ticker
+
+    Returns:
+
+    params : np.ndarray - (omega, alpha, beta) for the unscaled daily returns
+    last_variance : float - one day ahead conditional variance forecast
+    """
+
+    returns = np.asarray(returns, dtype=float)
+    returns = returns[~np.isnan(returns)]
+
+    # work in percent so the parameters are of order one
+    scaled = 100 * (returns - returns.mean())
+    sample_variance = scaled.var()
+
+    if initial is None:
+        x0 = np.array([0.05 * sample_variance, 0.08, 0.9])
+    else:
+        x0 = np.array(initial, dtype=float) * [1e4, 1, 1]
+
+    result = minimize(_garch_negative_log_likelihood, x0, args=(scaled, sample_variance), jac=True, method='SLSQP',
+                      bounds=[(1e-8 * sample_variance, 10 * sample_variance), (0, 1), (0, 1)],
+                      constraints=[{'type': 'ineq', 'fun': lambda p: 0.9999 - p[1] - p[2], 'jac': lambda p: np.array([0, -1.0, -1.0])}])
+
+    omega, alpha, beta = result.x
+
+    variances, _ = _garch_variances(result.x, scaled, sample_variance)
+    last_variance = omega + alpha * scaled[-1]**2 + beta * variances[-1]
+
+    return np.array([omega / 1e4, alpha, beta]), last_variance / 1e4
+
+def garch_term_structure(params, next_variance, expiration_range):
+
+    """
+    Description:
+
+    annualized volatility implied by the GARCH forecast for every expiration, the average of the expected daily variances
+    between now and the expiration (252 trading days per year)
+
+    Parameters:
+
+    params : np.ndarray - (omega, alpha, beta) from fit_garch
+    next_variance : float - one day ahead conditional variance from fit_garch
+    expiration_range : array-like - times to maturity in years
+
+    Returns:
+
+    sigma : np.ndarray - annualized volatility per expiration, pass sigma[np.newaxis, :] to the grid pricers
+    """
+
+    omega, alpha, beta = params
+    persistence = alpha + beta
+
+    long_run_variance = omega / (1 - persistence)
+
+    days = np.maximum(np.asarray(expiration_range, dtype=float) * 252, 1)
+
+    # sum over h = 1..days of persistence^(h - 1), the geometric series of the decaying shock
+    decay = (1 - persistence**days) / (1 - persistence) / days
+
+    average_variance = long_run_variance + (next_variance - long_run_variance) * decay
+
+    return np.sqrt(average_variance * 252)
+
+# last fitted (omega, alpha, beta) per (ticker, method)
+_garch_warm_start = {}
+
+def compute_garch_volatility(stock_data, method:str="log", horizon:float=1.0, ticker:str=None):
+
+    """
+    annualized GARCH(1,1) volatility averaged over the next horizon years, warm started from the previous fit of the same
+    ticker and method, ticker defaults to the name of the single Close column of a yfinance dataframe (no warm start when unknown)
+    """
+
+    close = stock_data['Close']
+
+    if ticker is None and isinstance(close, pd.DataFrame) and close.shape[1] == 1:
+        ticker = close.columns[0]
+
+    returns = compute_returns(stock_data, method)['Returns'].dropna().to_numpy()
+
+    key = None if ticker is None else (ticker, method)
+
+    params, next_variance = fit_garch(returns, _garch_warm_start.get(key))
+
+    if key is not None:
+        _garch_warm_start[key] = params
+
+    return float(garch_term_structure(params, next_variance, [horizon])[0])
+
+def compute_range_volatility(open_, high, low, close, estimator:str="yang zhang"):
+
+    """
+    Description:
+
+    range-based volatility estimators from OHLC bars, vectorized over time (axis 0) and optionally over tickers (columns),
+    missing bars (NaN) are ignored
+
+    estimators:
+    parkinson - high/low range
+    garman klass - high/low range and open/close move
+    rogers satchell - high/low relative to open and close, unbiased under drift
+    yang zhang - overnight, open-to-close and rogers satchell variances combined, handles opening jumps
+
+    Parameters:
+
+    open_, high, low, close : np.ndarray - bar prices, 1d (one ticker) or 2d (one column per ticker)
+    estimator : str - parkinson, garman klass, rogers satchell or yang zhang
+
+    Returns:
+
+    annualized_volatility : float or np.ndarray - one value per column
+    """
+
+    o, h, l, c = (np.log(np.asarray(x, dtype=float)) for x in (open_, high, low, close))
+
+    high_low = h - l
+    close_open = c - o
+
+    if estimator == "parkinson":
+        variance = np.nanmean(high_low**2, axis=0) / (4 * np.log(2))
+
+    elif estimator == "garman klass":
+        variance = np.nanmean(0.5 * high_low**2 - (2 * np.log(2) - 1) * close_open**2, axis=0)
+
+    elif estimator == "rogers satchell":
+        variance = np.nanmean((h - c) * (h - o) + (l - c) * (l - o), axis=0)
+
+    elif estimator == "yang zhang":
+
+        # overnight returns pair each open with the previous close, so the first bar only contributes intraday terms
+        overnight = o[1:] - c[:-1]
+        intraday = close_open[1:]
+        rs = ((h - c) * (h - o) + (l - c) * (l - o))[1:]
+
+        n = np.sum(~np.isnan(overnight), axis=0)
+        k = 0.34 / (1.34 + (n + 1) / (n - 1))
+
+        variance = np.nanvar(overnight, axis=0, ddof=1) + k * np.nanvar(intraday, axis=0, ddof=1) + (1 - k) * np.nanmean(rs, axis=0)
+
+    else:
+        raise ValueError(f"unknown range estimator {estimator}")
+
+    return np.sqrt(variance) * np.sqrt(252)
+
+def compute_range_volatility_from_data(stock_data, estimator:str="yang zhang"):
+
+    """
+    range-based annualized volatility of a get_stock_data dataframe (one value per ticker column, a float for a single ticker)
+    """
+
+    bars = [stock_data[column].to_numpy(dtype=float) for column in ('Open', 'High', 'Low', 'Close')]
+
+    volatility = compute_range_volatility(*bars, estimator=estimator)
+
+    return float(volatility[0]) if np.ndim(volatility) and np.size(volatility) == 1 else volatility
+
+def compute_volatility_report(stock_data, windows=(21, 63), include_range:bool=True, include_garch:bool=False):
+
+    """
+    Description:
+
+    evaluates every estimator side by side for one or many tickers, simple and log returns are computed once
+    as numpy arrays and shared by all close-to-close estimators
+
+    Parameters:
+
+    stock_data : pd.DataFrame - get_stock_data style dataframe (Close, High, Low, Open columns, one sub-column per ticker)
+    windows : tuple - trailing window lengths in trading days for the windowed std and log estimators
+    include_range : bool - add the parkinson, garman klass, rogers satchell and yang zhang estimators (needs Open/High/Low)
+    include_garch : bool - add the garch and log garch estimators (one likelihood fit per ticker and method)
+
+    Returns:
+
+    report : pd.DataFrame - annualized volatility with one row per ticker and one column per estimator
+    """
+
+    closes = stock_data['Close']
+
+    if isinstance(closes, pd.Series):
+        closes = closes.to_frame()
+
+    tickers = list(closes.columns)
+    values = closes.to_numpy(dtype=float)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = values[1:] / values[:-1]
+
+    returns = {'std': ratio - 1, 'log': np.log(ratio)}
+
+    annualize = np.sqrt(252)
+
+    report = {
+              'std': _std_dev_from_returns(returns['std']) * annualize,
+              'log': _std_dev_from_returns(returns['log']) * annualize,
+              'ewma': _ewma_from_returns(returns['std']) * annualize,
+              'log ewma': _ewma_from_returns(returns['log']) * annualize
+             }
+
+    for window in windows:
+        report[f'std {window}d'] = _std_dev_from_returns(returns['std'][-window:]) * annualize
+        report[f'log {window}d'] = _std_dev_from_returns(returns['log'][-window:]) * annualize
+
+    if include_range:
+
+        bars = [stock_data[column].to_numpy(dtype=float).reshape(values.shape) for column in ('Open', 'High', 'Low', 'Close')]
+
+        for estimator in ('parkinson', 'garman klass', 'rogers satchell', 'yang zhang'):
+            report[estimator] = np.atleast_1d(compute_range_volatility(*bars, estimator=estimator))
+
+    if include_garch:
+
+        for (name, method) in (('garch', 'std'), ('log garch', 'log')):
+
+            sigma = []
+
+            for column in returns[method].T:
+                params, next_variance = fit_garch(column)
+                sigma.append(garch_term_structure(params, next_variance, [1.0])[0])
+
+            report[name] = np.array(sigma)
+
+    return pd.DataFrame(report, index=pd.Index(tickers, name='Ticker'))
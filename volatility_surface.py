@@ -0,0 +1,202 @@
+import numpy as np
+
+def _svi_total_variance(params, k):
+
+    """
+    raw SVI total implied variance w(k) = a + b * (rho * (k - m) + sqrt((k - m)^2 + sigma^2))
+    """
+
+    a, b, rho, m, sigma = params
+
+    return a + b * (rho * (k - m) + np.sqrt((k - m)**2 + sigma**2))
+
+def fit_svi_slice(k, w, weights=None, num_m:int=25, num_sigma:int=25):
+
+    """
+    Description:
+
+    fits one raw SVI slice to total implied variances with the quasi-explicit method: for fixed (m, sigma) the
+    model is linear in its other three parameters, so a whole grid of (m, sigma) candidates is solved at once with
+    batched 3x3 normal equations and the best candidate is kept
+
+    Parameters:
+
+    k : np.ndarray - log-moneyness log(K / F) of each quote
+    w : np.ndarray - total implied variance (implied vol^2 * T) of each quote
+    weights : np.ndarray - optional weight per quote (ex. vega)
+    num_m : int - number of candidate m values
+    num_sigma : int - number of candidate sigma values
+
+    Returns:
+
+    params : np.ndarray - (a, b, rho, m, sigma)
+    rmse : float - weighted root mean squared error in total variance
+    """
+
+    k = np.asarray(k, dtype=float)
+    w = np.asarray(w, dtype=float)
+    weights = np.ones_like(k) if weights is None else np.asarray(weights, dtype=float)
+
+    span = max(k.max() - k.min(), 1e-4)
+
+    m_grid = np.linspace(k.min() - 0.5 * span, k.max() + 0.5 * span, num_m)
+    sigma_grid = np.geomspace(1e-3, 2 * span, num_sigma)
+
+    m, sigma = (g.ravel()[:, np.newaxis] for g in np.meshgrid(m_grid, sigma_grid))
+
+    # w = a + d * y + c * sqrt(y^2 + 1) with y = (k - m) / sigma, d = b * rho * sigma, c = b * sigma
+    y = (k - m) / sigma
+    basis = np.stack([np.ones_like(y), y, np.sqrt(y**2 + 1)], axis=-1)      # (candidates, quotes, 3)
+
+    weighted = basis * weights[:, np.newaxis]
+    normal = np.einsum('cqi,cqj->cij', weighted, basis)
+    # a small ridge relative to each system's scale keeps the nearly collinear candidates (all quotes on one wing) solvable
+    normal += 1e-10 * np.trace(normal, axis1=1, axis2=2)[:, np.newaxis, np.newaxis] * np.eye(3)
+    rhs = np.einsum('cqi,q->ci', weighted, w)
+
+    a, d, c = np.linalg.solve(normal, rhs[..., np.newaxis])[..., 0].T
+
+    # keep the slice well defined: b >= 0 and |rho| <= 1
+    c = np.maximum(c, 1e-10)
+    d = np.clip(d, -c, c)
+
+    residual = a[:, np.newaxis] + d[:, np.newaxis] * y + c[:, np.newaxis] * basis[..., 2] - w
+    a = a - np.sum(weights * residual, axis=1) / np.sum(weights)
+
+    residual = a[:, np.newaxis] + d[:, np.newaxis] * y + c[:, np.newaxis] * basis[..., 2] - w
+    errors = np.sum(weights * residual**2, axis=1) / np.sum(weights)
+
+    best = np.argmin(errors)
+
+    m_best, sigma_best = m[best, 0], sigma[best, 0]
+    b = c[best] / sigma_best
+    rho = d[best] / c[best]
+
+    return np.array([a[best], b, rho, m_best, sigma_best]), float(np.sqrt(errors[best]))
+
+class VolatilitySurface:
+
+    """
+    Description:
+
+    implied volatility surface made of one SVI slice per expiration, between slices the total variance at a fixed
+    log-moneyness is interpolated linearly in time (before the first slice it scales with T, after the last the
+    implied volatility is held flat)
+
+    build it with VolatilitySurface.fit(...) and query it with vol(K, T) or grid(strike_range, expiration_range)
+    """
+
+    def __init__(self, S:float, expirations, rates, params):
+
+        order = np.argsort(expirations)
+
+        self.S = S
+        self.expirations = np.asarray(expirations, dtype=float)[order]
+        self.rates = np.asarray(rates, dtype=float)[order]
+        self.params = np.asarray(params, dtype=float)[order]
+
+    @classmethod
+    def fit(cls, implied_vol, strike_range, expiration_range, S:float, r, min_quotes:int=5):
+
+        """
+        Parameters:
+
+        implied_vol : np.ndarray (2d-array) - implied volatilities (strikes x expirations), NaN for missing quotes,
+                      ex. from implied_volatility.compute_implied_volatility_grid
+        strike_range : array-like - strike prices (rows)
+        expiration_range : array-like - times to maturity in years (columns)
+        S : float - current underlying stock price
+        r : float or array-like - interest rate, scalar or one per expiration
+        min_quotes : int - expirations with fewer valid quotes are skipped
+
+        Returns:
+
+        surface : VolatilitySurface
+        """
+
+        implied_vol = np.asarray(implied_vol, dtype=float)
+        K = np.asarray(strike_range, dtype=float)
+        T = np.asarray(expiration_range, dtype=float)
+        rates = np.broadcast_to(np.asarray(r, dtype=float).ravel(), T.shape)
+
+        fitted_T, fitted_r, params = [], [], []
+
+        for j in range(T.size):
+
+            valid = np.isfinite(implied_vol[:, j]) & (T[j] > 0)
+
+            if valid.sum() < min_quotes:
+                continue
+
+            k = np.log(K[valid] / (S * np.exp(rates[j] * T[j])))
+            w = implied_vol[valid, j]**2 * T[j]
+
+            slice_params, _ = fit_svi_slice(k, w)
+
+            fitted_T.append(T[j])
+            fitted_r.append(rates[j])
+            params.append(slice_params)
+
+        if not params:
+            raise ValueError(f"no expiration has at least {min_quotes} valid quotes")
+
+        return cls(S, fitted_T, fitted_r, params)
+
+    def total_variance(self, K, T):
+
+        """
+        total implied variance for arrays K and T (broadcast together)
+        """
+
+        K, T = np.broadcast_arrays(np.asarray(K, dtype=float), np.asarray(T, dtype=float))
+
+        r = np.interp(T, self.expirations, self.rates)
+        k = np.log(K / (self.S * np.exp(r * T)))
+
+        # total variance of every slice at every requested log-moneyness, shape (slices, ...)
+        slices = np.stack([_svi_total_variance(p, k) for p in self.params])
+
+        Ts = self.expirations
+        n = Ts.size
+
+        position = np.clip(np.searchsorted(Ts, T), 1, max(n - 1, 1))
+        lower = np.minimum(position - 1, n - 1)
+        upper = np.minimum(position, n - 1)
+
+        w_lower = np.take_along_axis(slices, lower[np.newaxis], axis=0)[0]
+        w_upper = np.take_along_axis(slices, upper[np.newaxis], axis=0)[0]
+
+        T_lower, T_upper = Ts[lower], Ts[upper]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            fraction = np.where(T_upper > T_lower, (T - T_lower) / (T_upper - T_lower), 0)
+
+        w = w_lower + fraction * (w_upper - w_lower)
+
+        # outside the fitted expirations keep the implied volatility of the nearest slice
+        w = np.where(T < Ts[0], slices[0] * T / Ts[0], w)
+        w = np.where(T > Ts[-1], slices[-1] * T / Ts[-1], w)
+
+        return np.maximum(w, 0)
+
+    def vol(self, K, T):
+
+        """
+        implied volatility for arrays K and T (broadcast together) in one call
+        """
+
+        T = np.asarray(T, dtype=float)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.sqrt(self.total_variance(K, T) / T)
+
+    def grid(self, strike_range, expiration_range):
+
+        """
+        implied volatility over a strike x expiration grid, can be passed as the per-cell sigma of options.compute_option_price_grid
+        """
+
+        K = np.asarray(strike_range, dtype=float)[:, np.newaxis]
+        T = np.asarray(expiration_range, dtype=float)[np.newaxis, :]
+
+        return self.vol(K, T)
@@ -0,0 +1,171 @@
+import os
+import json
+import time
+import numpy as np
+
+# US treasury yield indices on yahoo finance and their tenor in years
+TENORS = {
+          '^IRX': 0.25,
+          '^FVX': 5.0,
+          '^TNX': 10.0,
+          '^TYX': 30.0
+         }
+
+# ^IRX quotes the 13-week bill on a discount basis, the others quote semiannual bond-equivalent yields
+BILL_DAYS = {'^IRX': 91}
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "black_scholes", "yield_curve.json")
+
+class YieldCurve:
+
+    """
+    Description:
+
+    risk free term structure, rates between tenors are interpolated linearly and held flat beyond the first and last tenor
+
+    with the yahoo treasury indices the only nodes are 0.25, 5, 10 and 30 years, so every rate between 3 months and
+    5 years (where most listed options expire) lies on a straight line between the bill and the 5-year note and can
+    miss the curvature of the real curve in that range by several basis points
+
+    Parameters:
+
+    tenors : array-like - tenors in years (ascending)
+    rates : array-like - continuously compounded rates as decimals, one per tenor
+    fetched_at : float - time.time() when the rates were downloaded
+    """
+
+    def __init__(self, tenors, rates, fetched_at:float=None):
+
+        order = np.argsort(tenors)
+
+        self.tenors = np.asarray(tenors, dtype=float)[order]
+        self.rate_points = np.asarray(rates, dtype=float)[order]
+        self.fetched_at = time.time() if fetched_at is None else fetched_at
+
+    def rates(self, expiration_range):
+
+        """
+        returns the interpolated rate for every time to maturity (years) in expiration_range
+        """
+
+        return np.interp(expiration_range, self.tenors, self.rate_points)
+
+    def discount_factors(self, expiration_range):
+
+        """
+        returns exp(-r(T) * T) for every time to maturity T in expiration_range
+        """
+
+        T = np.asarray(expiration_range, dtype=float)
+
+        return np.exp(-self.rates(T) * T)
+
+    def age(self):
+
+        return time.time() - self.fetched_at
+
+    def to_dict(self):
+
+        return {'tenors': self.tenors.tolist(), 'rates': self.rate_points.tolist(), 'fetched_at': self.fetched_at}
+
+    @classmethod
+    def from_dict(cls, data:dict):
+
+        return cls(data['tenors'], data['rates'], data['fetched_at'])
+
+def quote_to_continuous_rate(symbol:str, quote:float):
+
+    """
+    converts a yahoo treasury index quote (percent) to a continuously compounded rate as a decimal,
+    bills are quoted as a bank discount yield and notes/bonds as a semiannual bond-equivalent yield
+    """
+
+    y = quote / 100
+
+    if symbol in BILL_DAYS:
+
+        days = BILL_DAYS[symbol]
+
+        # discount yield -> price per 1 of face value -> continuously compounded over the bill's life
+        price = 1 - y * days / 360
+
+        return -np.log(price) * 365 / days
+
+    return 2 * np.log1p(y / 2)
+
+def download_yield_curve():
+
+    """
+    downloads the last close of every treasury index in TENORS with a single multi-ticker request
+    and converts the quotes to continuously compounded rates
+    """
+
+    import yfinance as yf
+
+    print("Retrieving risk free term structure from US treasury yields\n")
+
+    closes = yf.download(list(TENORS), period="5d", auto_adjust=True, progress=False)['Close']
+
+    tenors = []
+    rates = []
+
+    for (symbol, tenor) in TENORS.items():
+
+        column = closes[symbol].dropna() if symbol in closes else []
+
+        if len(column):
+            tenors.append(tenor)
+            rates.append(quote_to_continuous_rate(symbol, float(column.iloc[-1])))
+
+    if not tenors:
+        raise RuntimeError("could not download any treasury yields")
+
+    return YieldCurve(tenors, rates)
+
+# cached curve per persistence path (None for the in-memory only curve)
+_curves = {}
+
+def get_yield_curve(ttl:float=12 * 3600, path:str=DEFAULT_PATH, download=download_yield_curve):
+
+    """
+    Description:
+
+    returns the risk free term structure, reusing the in-memory or on-disk copy while it is younger than ttl seconds
+    and downloading (and persisting) a new one otherwise
+
+    Parameters:
+
+    ttl : float - maximum age in seconds of a cached curve
+    path : str - JSON file the curve is persisted to, None to keep it in memory only
+    download : callable - returns a fresh YieldCurve
+
+    Returns:
+
+    curve : YieldCurve
+    """
+
+    curve = _curves.get(path)
+
+    if curve is not None and curve.age() < ttl:
+        return curve
+
+    if path is not None and os.path.exists(path):
+
+        with open(path) as f:
+            stored = YieldCurve.from_dict(json.load(f))
+
+        if stored.age() < ttl:
+            _curves[path] = stored
+            return stored
+
+    curve = download()
+    _curves[path] = curve
+
+    if path is not None:
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        with open(path, "w") as f:
+            json.dump(curve.to_dict(), f)
+
+    return curve